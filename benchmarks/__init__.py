@@ -0,0 +1,19 @@
+"""
+Benchmarks for the PyJUnix scripts.
+
+Every script is run over deterministic synthetic data of increasing size, measuring its throughput, its latency (as 
+a complete command line call) and its peak memory use. Results are written to a JSON file that can be compared 
+against a previous run, to spot performance regressions.
+
+Usage (from the root of the repository):
+
+::
+
+    python -m benchmarks run --output results.json
+    python -m benchmarks run --baseline baseline.json --sizes 1K,10K,100K,1M,10M
+    python -m benchmarks compare baseline.json results.json
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
@@ -0,0 +1,73 @@
+"""
+Command line interface of the benchmarks (see ``benchmarks/__init__.py``).
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+from .cases import CASES
+from .runner import parse_size, run_benchmarks, compare_results, print_comparison
+
+DEFAULT_SIZES = "1K,10K,100K"
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks the PyJUnix scripts.")
+    sub_parsers = parser.add_subparsers(dest="command")
+    sub_parsers.required = True
+    
+    run_parser = sub_parsers.add_parser("run", help="Run the benchmarks.")
+    run_parser.add_argument("--scripts", default=",".join(CASES), 
+                            help="Comma separated scripts to benchmark (default: all).")
+    run_parser.add_argument("--sizes", default=DEFAULT_SIZES, 
+                            help=f"Comma separated input sizes, e.g. 1K,10K,1M,10M (default: {DEFAULT_SIZES}).")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Times each measurement is repeated.")
+    run_parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "pyjunix-benchmarks"), 
+                            help="Directory to generate (and keep) the input data in.")
+    run_parser.add_argument("--no-latency", dest="measure_latencies", action="store_false", 
+                            help="Skip measuring the latency of complete command line calls.")
+    run_parser.add_argument("--output", default="benchmark-results.json", help="File to write the results to.")
+    run_parser.add_argument("--baseline", help="Results file to compare the results against.")
+    run_parser.add_argument("--threshold", type=float, default=0.1, 
+                            help="Relative slow down that counts as a regression (default: 0.1).")
+                            
+    compare_parser = sub_parsers.add_parser("compare", help="Compare two results files.")
+    compare_parser.add_argument("baseline", help="Results file of the baseline.")
+    compare_parser.add_argument("current", help="Results file to compare against the baseline.")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, 
+                                help="Relative slow down that counts as a regression (default: 0.1).")
+                                
+    args = parser.parse_args(argv[1:])
+    
+    if args.command == "run":
+        script_names = [s.strip() for s in args.scripts.split(",") if s.strip()]
+        unknown_scripts = set(script_names) - set(CASES)
+        if unknown_scripts:
+            parser.error(f"no benchmark for {', '.join(sorted(unknown_scripts))}")
+        current = run_benchmarks(script_names, [parse_size(s) for s in args.sizes.split(",")], args.data_dir, 
+                                 args.repeat, args.measure_latencies)
+        with open(args.output, "wt") as fd:
+            json.dump(current, fd, indent=4)
+        if not args.baseline:
+            return 0
+        with open(args.baseline, "rt") as fd:
+            baseline = json.load(fd)
+    else:
+        with open(args.baseline, "rt") as fd:
+            baseline = json.load(fd)
+        with open(args.current, "rt") as fd:
+            current = json.load(fd)
+            
+    comparison = compare_results(baseline, current, args.threshold)
+    print_comparison(comparison)
+    return 1 if any(c[-1] for c in comparison) else 0
+    
+    
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,155 @@
+"""
+What each script is benchmarked on.
+
+Every case prepares the inputs of a script for a given number of items (caching them in a data directory, as large 
+inputs take a while to generate) and returns the command line to run the script with.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import shutil
+import collections
+from . import generators
+
+# Script name, function that prepares its inputs and largest size worth running the script for (``None`` for scripts
+# whose work does not depend on an input size).
+#
+# A decoded item takes about 1KB of memory. Scripts that hold their whole input in memory (e.g. pyjprtprn, pyjpaste or 
+# pyjjoin without --sorted) would need about 10GB for 10M items, therefore they stop at 1M. pyjsort and pyjgrep are 
+# benchmarked in their bounded memory modes (-S and -R) instead, which go up to 10M, as does pyjuniq, which only holds 
+# the distinct items (a tenth of its input).
+BenchmarkCase = collections.namedtuple("BenchmarkCase", ["script", "prepare", "max_size"])
+
+# A prepared invocation: Script arguments, file to feed to stdin (or ``None``) and number of items processed.
+PreparedCase = collections.namedtuple("PreparedCase", ["argv", "stdin", "items"])
+
+
+def _cached(data_dir, file_name, write):
+    """
+    Returns the path of an input file, calling ``write(path)`` to generate it if it does not exist yet.
+    """
+    path = os.path.join(data_dir, file_name)
+    if not os.path.exists(path):
+        temp_path = f"{path}.partial"
+        write(temp_path)
+        os.replace(temp_path, path)
+    return path
+    
+    
+def _list_of_dicts(data_dir, n, seed=0):
+    return _cached(data_dir, f"dicts-{n}-{seed}.json", 
+                   lambda path: generators.write_json_array(path, generators.iter_dicts(n, seed)))
+                   
+                   
+def _ndjson_of_dicts(data_dir, n, seed=0):
+    return _cached(data_dir, f"dicts-{n}-{seed}.ndjson", 
+                   lambda path: generators.write_ndjson(path, generators.iter_dicts(n, seed)))
+                   
+                   
+def prepare_pyjarray(data_dir, n):
+    return PreparedCase([], _ndjson_of_dicts(data_dir, n), n)
+    
+    
+def prepare_pyjunarray(data_dir, n):
+    return PreparedCase([], _list_of_dicts(data_dir, n), n)
+    
+    
+def prepare_pyjkeys(data_dir, n):
+    path = _cached(data_dir, f"keys-{n}.json", 
+                   lambda path: generators.write_json(path, {f"key{k}": k for k in range(n)}))
+    return PreparedCase([], path, n)
+    
+    
+def prepare_pyjls(data_dir, n):
+    path = os.path.join(data_dir, f"tree-{n}")
+    if not os.path.exists(path):
+        generators.make_directory_tree(f"{path}.partial", n)
+        os.replace(f"{path}.partial", path)
+    return PreparedCase([path, "-maxdepth", "16"], None, n)
+    
+    
+def prepare_pyjgrep(data_dir, n):
+    return PreparedCase(["-R", "$[*].pid"], _list_of_dicts(data_dir, n), n)
+    
+    
+def prepare_pyjprtprn(data_dir, n):
+    return PreparedCase([], _list_of_dicts(data_dir, n), n)
+    
+    
+def prepare_pyjsort(data_dir, n):
+    # Up to about 500K items are sorted in memory, larger inputs through sorted runs on disk.
+    return PreparedCase(["-k", "$[*].pid", "-S", "500M", "-T", data_dir], _list_of_dicts(data_dir, n), n)
+    
+    
+def prepare_pyjlast(data_dir, n):
+    path = _cached(data_dir, f"wtmp-{n}", lambda path: generators.write_wtmp(path, n))
+    return PreparedCase(["-f", path], None, n)
+    
+    
+def prepare_pyjps(data_dir, n):
+    # Every process, since the benchmark does not run on a terminal.
+    return PreparedCase(["-e"], None, 1)
+    
+    
+def prepare_pyjjoin(data_dir, n):
+    paths = [_cached(data_dir, f"lists-{n}-{seed}.json", 
+                     lambda path, seed=seed: generators.write_json_array(path, generators.iter_lists(n, seed)))
+             for seed in (1, 2)]
+    return PreparedCase(paths, None, 2 * n)
+    
+    
+def prepare_pyjpaste(data_dir, n):
+    return PreparedCase([_list_of_dicts(data_dir, n, 1), _list_of_dicts(data_dir, n, 2)], None, 2 * n)
+    
+    
+def prepare_pyjcat(data_dir, n):
+    return PreparedCase([_ndjson_of_dicts(data_dir, n)], None, n)
+    
+    
+def prepare_pyjsplit(data_dir, n):
+    output_dir = os.path.join(data_dir, f"split-{n}")
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.makedirs(output_dir)
+    return PreparedCase([_list_of_dicts(data_dir, n), "-l", "10000", "-d", "-a", "4", 
+                         "--prefix", os.path.join(output_dir, "x")], None, n)
+                         
+                         
+def prepare_pyjdiff(data_dir, n):
+    original = generators.nested_document(n)
+    paths = [_cached(data_dir, f"nested-{n}.json", lambda path: generators.write_json(path, original)),
+             _cached(data_dir, f"nested-{n}-mutated.json", 
+                     lambda path: generators.write_json(path, generators.mutate_document(original)))]
+    return PreparedCase(paths, None, n)
+    
+    
+def prepare_pyjindex(data_dir, n):
+    # The index is written next to its (cached) input and rebuilt by every run.
+    return PreparedCase(["-k", "$.user", "-k", "$.parent.pid", _list_of_dicts(data_dir, n)], None, n)
+    
+    
+def prepare_pyjuniq(data_dir, n):
+    path = _cached(data_dir, f"dicts-{n}-dup.json", 
+                   lambda path: generators.write_json_array(path, generators.iter_dicts(n, 0, max(n // 10, 1))))
+    return PreparedCase([], path, n)
+    
+    
+CASES = {"pyjarray": BenchmarkCase("pyjarray", prepare_pyjarray, 10000000),
+         "pyjunarray": BenchmarkCase("pyjunarray", prepare_pyjunarray, 10000000),
+         "pyjkeys": BenchmarkCase("pyjkeys", prepare_pyjkeys, 1000000),
+         "pyjls": BenchmarkCase("pyjls", prepare_pyjls, 100000),
+         "pyjgrep": BenchmarkCase("pyjgrep", prepare_pyjgrep, 10000000),
+         "pyjprtprn": BenchmarkCase("pyjprtprn", prepare_pyjprtprn, 1000000),
+         "pyjsort": BenchmarkCase("pyjsort", prepare_pyjsort, 10000000),
+         "pyjlast": BenchmarkCase("pyjlast", prepare_pyjlast, 1000000),
+         "pyjps": BenchmarkCase("pyjps", prepare_pyjps, None),
+         "pyjjoin": BenchmarkCase("pyjjoin", prepare_pyjjoin, 1000000),
+         "pyjpaste": BenchmarkCase("pyjpaste", prepare_pyjpaste, 1000000),
+         "pyjcat": BenchmarkCase("pyjcat", prepare_pyjcat, 10000000),
+         "pyjsplit": BenchmarkCase("pyjsplit", prepare_pyjsplit, 10000000),
+         "pyjdiff": BenchmarkCase("pyjdiff", prepare_pyjdiff, 100000),
+         "pyjuniq": BenchmarkCase("pyjuniq", prepare_pyjuniq, 10000000),
+         "pyjindex": BenchmarkCase("pyjindex", prepare_pyjindex, 10000000),
+         }
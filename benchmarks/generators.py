@@ -0,0 +1,171 @@
+"""
+Deterministic synthetic data for the benchmarks.
+
+The same size and seed always produce the same data. Items are generated lazily, so that inputs of millions of items 
+can be written to disk without holding them in memory.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import json
+import random
+import struct
+
+USER_NAMES = ("root", "alice", "bob", "carol", "dave", "eve", "mallory", "trent")
+
+# The layout of a utmp / wtmp record on Linux (see ``man 5 utmp``), as read by the ``utmp`` package.
+UTMP_RECORD = struct.Struct("hi32s4s32s256shhiii4i20s")
+
+
+def make_record(item_id):
+    """
+    Returns the object with the given id, as found in the lists of objects used by the benchmarks.
+    """
+    return {"pid": item_id,
+            "user": USER_NAMES[item_id % len(USER_NAMES)],
+            "name": f"process-{item_id:08d}",
+            "cpu": (item_id * 7919 % 1000) / 10.0,
+            "tags": [f"t{item_id % 3}", f"t{item_id % 5}"],
+            "parent": {"pid": item_id // 2, "active": item_id % 2 == 0}}
+            
+            
+def iter_dicts(n, seed=0, distinct=None):
+    """
+    Generates ``n`` objects in random order.
+    
+    :param n: Number of objects.
+    :type n: int
+    :param seed: Seed of the random order.
+    :type seed: int
+    :param distinct: If set, objects are drawn (with repetition) out of this many distinct ones.
+    :type distinct: int
+    """
+    rnd = random.Random(seed)
+    if distinct is None:
+        item_ids = list(range(n))
+        rnd.shuffle(item_ids)
+        for an_id in item_ids:
+            yield make_record(an_id)
+    else:
+        for k in range(n):
+            yield make_record(rnd.randrange(distinct))
+            
+            
+def iter_lists(n, seed=0, key_range=None):
+    """
+    Generates ``n`` lists whose first element is an integer key in ``[0, key_range)`` (default ``n``).
+    """
+    rnd = random.Random(seed)
+    key_range = key_range or n
+    for k in range(n):
+        a_key = rnd.randrange(key_range)
+        yield [a_key, USER_NAMES[a_key % len(USER_NAMES)], rnd.random()]
+        
+        
+def nested_document(n, seed=0, fanout=10):
+    """
+    Returns a document of nested objects and lists with ``n`` leaves.
+    """
+    rnd = random.Random(seed)
+    
+    def make_level(n_leaves, depth):
+        if n_leaves <= fanout:
+            return {f"leaf{k}": rnd.choice([rnd.randrange(1000), rnd.random(), rnd.choice(USER_NAMES), None, True]) 
+                    for k in range(n_leaves)}
+        branch_size = -(-n_leaves // fanout)
+        branches = [make_level(min(branch_size, n_leaves - k), depth + 1) for k in range(0, n_leaves, branch_size)]
+        if depth % 2:
+            return branches
+        return {f"node{k}": a_branch for k, a_branch in enumerate(branches)}
+        
+    return make_level(n, 0)
+    
+    
+def mutate_document(document, seed=0, rate=0.01):
+    """
+    Returns a copy of a nested document with a fraction ``rate`` of its leaves changed.
+    """
+    rnd = random.Random(seed)
+    
+    def mutate(value):
+        if isinstance(value, dict):
+            return {k: mutate(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [mutate(v) for v in value]
+        if rnd.random() < rate:
+            return rnd.randrange(1000, 2000)
+        return value
+        
+    return mutate(document)
+    
+    
+def write_json_array(path, items):
+    """
+    Writes an iterable of items to ``path`` as a JSON array, one item at a time.
+    """
+    with open(path, "wt", encoding="utf-8") as fd:
+        fd.write("[")
+        for k, an_item in enumerate(items):
+            if k:
+                fd.write(",\n")
+            fd.write(json.dumps(an_item))
+        fd.write("]\n")
+        
+        
+def write_ndjson(path, items):
+    """
+    Writes an iterable of items to ``path`` as newline delimited JSON.
+    """
+    with open(path, "wt", encoding="utf-8") as fd:
+        for an_item in items:
+            fd.write(json.dumps(an_item))
+            fd.write("\n")
+            
+            
+def write_json(path, document):
+    """
+    Writes a single document to ``path``.
+    """
+    with open(path, "wt", encoding="utf-8") as fd:
+        json.dump(document, fd)
+        
+        
+def write_wtmp(path, n, seed=0):
+    """
+    Writes ``n`` login / logout records to ``path`` in the binary format of ``/var/log/wtmp``.
+    """
+    rnd = random.Random(seed)
+    timestamp = 1570000000
+    with open(path, "wb") as fd:
+        for k in range(n):
+            a_user = rnd.choice(USER_NAMES)
+            timestamp += rnd.randrange(1, 3600)
+            record_type = rnd.choice((7, 8)) if k else 2
+            fd.write(UTMP_RECORD.pack(record_type, 1000 + k % 30000, f"pts/{k % 16}".encode(), f"{k % 16}".encode(), 
+                                      a_user.encode(), f"10.0.{k % 256}.{rnd.randrange(256)}".encode(), 0, 0, 
+                                      k, timestamp, rnd.randrange(1000000), 0, 0, 0, 0, b""))
+                                      
+                                      
+def make_directory_tree(path, n, seed=0, fanout=32):
+    """
+    Creates ``n`` small files under ``path``, spread over nested directories of at most ``fanout`` entries.
+    """
+    rnd = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    
+    def populate(dir_path, n_files):
+        if n_files <= fanout:
+            for k in range(n_files):
+                with open(os.path.join(dir_path, f"file{k}.txt"), "wb") as fd:
+                    fd.write(b"x" * rnd.randrange(64))
+            return
+        branch_size = -(-n_files // fanout)
+        for k, start in enumerate(range(0, n_files, branch_size)):
+            sub_dir = os.path.join(dir_path, f"dir{k}")
+            os.makedirs(sub_dir, exist_ok=True)
+            populate(sub_dir, min(branch_size, n_files - start))
+            
+    populate(path, n)
@@ -0,0 +1,196 @@
+"""
+Runs the benchmark cases and compares their results.
+
+Each case is measured in a fresh worker process (``python -m benchmarks.runner``), so that the peak memory use of 
+one script does not hide that of the next one. Within the worker, the script is called as ``pyjbox`` would call it, 
+including argument parsing and encoding its result, with its output discarded. The latency of a case is the wall 
+time of a complete command line call through ``pyjbox.py``, including starting the interpreter.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import datetime
+import resource
+import statistics
+import subprocess
+from .cases import CASES
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Metrics compared across runs (lower is better for all of them).
+COMPARED_METRICS = ("seconds", "latency_seconds", "peak_rss_kb")
+
+
+def parse_size(size_spec):
+    """
+    Translates a size such as ``10K`` or ``1M`` to a number of items.
+    """
+    multipliers = {"K": 1000, "M": 1000000}
+    size_spec = size_spec.strip().upper()
+    if size_spec[-1:] in multipliers:
+        return int(float(size_spec[:-1]) * multipliers[size_spec[-1]])
+    return int(size_spec)
+    
+    
+def measure_in_process(script_name, argv, stdin_path, repeat):
+    """
+    Calls a script ``repeat`` times within the current process and returns its timings and peak memory use.
+    """
+    sys.path.insert(0, REPOSITORY_DIR)
+    from pyjunix.registry import PyJScriptRegistry
+    from pyjunix.core import write_result
+    
+    script_class = PyJScriptRegistry()[script_name]
+    wall_times = []
+    cpu_times = []
+    with open(os.devnull, "wt") as out_stream:
+        for k in range(repeat):
+            if stdin_path is not None:
+                sys.stdin = open(stdin_path, "rt", encoding="utf-8")
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            write_result(script_class([script_name] + argv)(), out_stream=out_stream)
+            wall_times.append(time.perf_counter() - wall_start)
+            cpu_times.append(time.process_time() - cpu_start)
+            if stdin_path is not None:
+                sys.stdin.close()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else.
+    if sys.platform == "darwin":
+        peak_rss //= 1024
+    return {"wall_times": wall_times, "cpu_times": cpu_times, "peak_rss_kb": peak_rss}
+    
+    
+def measure_latency(script_name, argv, stdin_path, repeat):
+    """
+    Returns the wall times of ``repeat`` complete command line calls of a script.
+    """
+    latencies = []
+    for k in range(repeat):
+        stdin = open(stdin_path, "rb") if stdin_path is not None else subprocess.DEVNULL
+        try:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(REPOSITORY_DIR, "pyjbox.py"), script_name] + argv, 
+                           stdin=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            latencies.append(time.perf_counter() - start)
+        finally:
+            if stdin is not subprocess.DEVNULL:
+                stdin.close()
+    return latencies
+    
+    
+def run_case(case, size, data_dir, repeat=3, measure_latencies=True):
+    """
+    Benchmarks a script over ``size`` items and returns the result record.
+    """
+    prepared = case.prepare(data_dir, size)
+    worker = subprocess.run([sys.executable, "-m", "benchmarks.runner", case.script, json.dumps(prepared.argv), 
+                             json.dumps(prepared.stdin), str(repeat)], 
+                            cwd=REPOSITORY_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    measurements = json.loads(worker.stdout)
+    seconds = statistics.median(measurements["wall_times"])
+    result = {"script": case.script,
+              "size": size,
+              "items": prepared.items,
+              "seconds": seconds,
+              "seconds_min": min(measurements["wall_times"]),
+              "cpu_seconds": statistics.median(measurements["cpu_times"]),
+              "items_per_second": prepared.items / seconds if seconds > 0 else None,
+              "peak_rss_kb": measurements["peak_rss_kb"]}
+    if measure_latencies:
+        result["latency_seconds"] = statistics.median(measure_latency(case.script, prepared.argv, prepared.stdin, 
+                                                                      repeat))
+    return result
+    
+    
+def run_benchmarks(script_names, sizes, data_dir, repeat=3, measure_latencies=True, log=sys.stderr):
+    """
+    Benchmarks each script over each size (up to the largest size that is worth running it for).
+    
+    :returns: The results document, as written to the results file.
+    :rtype: dict
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    results = []
+    for a_script_name in script_names:
+        case = CASES[a_script_name]
+        case_sizes = [None] if case.max_size is None else [s for s in sizes if s <= case.max_size]
+        for a_size in case_sizes:
+            print(f"{a_script_name} {a_size or ''}", end="", file=log, flush=True)
+            try:
+                results.append(run_case(case, a_size, data_dir, repeat, measure_latencies))
+            except subprocess.CalledProcessError as e:
+                # The script failed, this is recorded rather than ending the run.
+                results.append({"script": a_script_name, "size": a_size, "error": f"exit status {e.returncode}"})
+                print(" failed", file=log, flush=True)
+                continue
+            print(f" {results[-1]['seconds']:.3f}s", file=log, flush=True)
+    return {"meta": get_run_metadata(repeat), "results": results}
+    
+    
+def get_run_metadata(repeat):
+    """
+    Describes the conditions of a run, to tell whether two runs are comparable.
+    """
+    sys.path.insert(0, REPOSITORY_DIR)
+    from pyjunix.core import get_json_codec
+    
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPOSITORY_DIR, stdout=subprocess.PIPE, 
+                                stderr=subprocess.DEVNULL, universal_newlines=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"timestamp": datetime.datetime.now().isoformat(),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "json_codec": type(get_json_codec()).__name__,
+            "repeat": repeat}
+            
+            
+def compare_results(baseline, current, threshold=0.1):
+    """
+    Compares two results documents.
+    
+    :param threshold: Relative increase of a metric over its baseline that counts as a regression.
+    :type threshold: float
+    :returns: A list of ``(script, size, metric, baseline value, current value, ratio, is_regression)`` tuples.
+    :rtype: list
+    """
+    baseline_results = {(r["script"], r["size"]): r for r in baseline["results"]}
+    comparison = []
+    for a_result in current["results"]:
+        baseline_result = baseline_results.get((a_result["script"], a_result["size"]))
+        if baseline_result is None:
+            continue
+        for a_metric in COMPARED_METRICS:
+            old_value, new_value = baseline_result.get(a_metric), a_result.get(a_metric)
+            if not old_value or new_value is None:
+                continue
+            ratio = new_value / old_value
+            comparison.append((a_result["script"], a_result["size"], a_metric, old_value, new_value, ratio, 
+                               ratio > 1 + threshold))
+    return comparison
+    
+    
+def print_comparison(comparison, out_stream=sys.stdout):
+    """
+    Prints the output of ``compare_results()`` as a table.
+    """
+    print(f"{'script':<12}{'size':>10}  {'metric':<16}{'baseline':>12}{'current':>12}{'ratio':>8}", file=out_stream)
+    for script, size, metric, old_value, new_value, ratio, is_regression in comparison:
+        print(f"{script:<12}{size or '':>10}  {metric:<16}{old_value:>12.4g}{new_value:>12.4g}{ratio:>8.2f}"
+              f"{'  REGRESSION' if is_regression else ''}", file=out_stream)
+              
+              
+if __name__ == "__main__":
+    # Worker mode: script name, arguments (JSON), stdin file (JSON) and number of repetitions.
+    print(json.dumps(measure_in_process(sys.argv[1], json.loads(sys.argv[2]), json.loads(sys.argv[3]), 
+                                        int(sys.argv[4]))))
@@ -1,43 +1,121 @@
 #!/usr/bin/env python3
+import os
 import sys
-from pyjunix import (PyJKeys, PyJArray, PyJUnArray, PyJLs, PyJGrep, PyJPrtPrn, 
-                     PyJSort, PyJLast, PyJPs, PyJJoin, PyJPaste, PyJCat, PyJSplit, 
-                     PyJDiff, PyJUniq)
+import shlex
+from pyjunix.registry import PyJScriptRegistry
+from pyjunix.core import (BasePyJUnixFunction, PyJUnixException, write_result, set_json_codec, run_pipeline, 
+                          JSON_CODECS, start_profiling, stop_profiling, write_profile, get_exit_status)
 
-script_dir = {
-              "pyjkeys": PyJKeys,
-              "pyjarray": PyJArray,
-              "pyjunarray": PyJUnArray,
-              "pyjls": PyJLs,
-              "pyjgrep": PyJGrep,
-              "pyjprtprn": PyJPrtPrn,
-              "pyjsort": PyJSort,
-              "pyjlast": PyJLast,
-              "pyjps": PyJPs,
-              "pyjjoin": PyJJoin,
-              "pyjpaste": PyJPaste,
-              "pyjcat": PyJCat,
-              "pyjsplit": PyJSplit,
-              "pyjdiff": PyJDiff,
-              "pyjuniq": PyJUniq,
-              } 
+# Scripts are imported on demand, along with their dependencies.
+script_dir = PyJScriptRegistry()
 
 
-if __name__ == "__main__":
+def get_script(script_name):
+    """
+    Returns the class of a script from its name (or the path it was invoked through).
+    """
+    return script_dir[script_name.lower().replace("./","").replace(".py","")]
+    
+    
+def split_pipeline(script_params):
+    """
+    Splits a command line into the command lines of the stages of a pipeline.
+    
+    Stages are separated by ``--then``, or by ``|`` if the whole pipeline is passed as a single (quoted) parameter. 
+    For example ``pyjls --then pyjsort -k '$[*].item'`` or ``"pyjls | pyjsort -k '$[*].item'"``.
+    """
+    separator = "--then"
+    if len(script_params) == 1 and "|" in script_params[0]:
+        lexer = shlex.shlex(script_params[0], posix=True, punctuation_chars="|")
+        lexer.whitespace_split = True
+        script_params = list(lexer)
+        separator = "|"
+        
+    stages = [[]]
+    for a_param in script_params:
+        if a_param == separator:
+            stages.append([])
+        else:
+            stages[-1].append(a_param)
+    return stages
+    
+
+def main(argv):
+    """
+    Runs the script (or pipeline of scripts) described by ``argv`` and writes its result to ``stdout``.
+    """
     # Complain if pyjbox doesn't know what to do.
-    if len(sys.argv)<2:
-        print(f"pyjbox is used to launch pyjunix scripts.\n\tUsage: pyjbox <script> [script parameters]\n\tScripts "
-              f"supported in this version:\n\t\t{', '.join(script_dir.keys())}\n")
+    if len(argv)<2 and "pyjbox" in argv[0]:
+        print(f"pyjbox is used to launch pyjunix scripts.\n\tUsage: pyjbox [--ndjson] [--codec CODEC] [--profile] <script> "
+              f"[script parameters] [--then <script> [script parameters] ...]\n"
+              f"\t       pyjbox --serve [--socket PATH] [--workers N]\n"
+              f"\tScripts supported in this version:\n\t\t{', '.join(script_dir.keys())}\n"
+              f"\tOptions:\n\t\t--ndjson  Stream results as newline delimited JSON rather than a JSON array\n"
+              f"\t\t--codec   JSON codec to use, auto or one of {', '.join(JSON_CODECS.keys())}\n"
+              f"\t\t--profile Write the time and memory spent in each phase of the call to stderr\n"
+              f"\t\t--serve   Serve calls from pyjboxc over a Unix domain socket\n"
+              f"\tScripts separated by --then run as a pipeline within the same process.\n")
         sys.exit(-2)
         
-    if "pyjbox" in sys.argv[0]:
-        script_to_run = sys.argv[1]
-        script_params = sys.argv[1:]
+    # PYJUNIX_PROFILE is either "stderr" or the path of a file to append profile records to.
+    profile_destination = os.environ.get("PYJUNIX_PROFILE") or None
+    if "pyjbox" in argv[0]:
+        script_params = argv[1:]
+        run_server = False
+        serve_options = {}
+        # Options to pyjbox itself precede the script name
+        while script_params and script_params[0].startswith("--"):
+            pyjbox_option = script_params.pop(0)
+            if pyjbox_option == "--ndjson":
+                BasePyJUnixFunction.stream_format = "ndjson"
+            elif pyjbox_option == "--codec" and script_params:
+                try:
+                    set_json_codec(script_params.pop(0))
+                except PyJUnixException as e:
+                    print(f"pyjbox: {e}")
+                    sys.exit(-2)
+            elif pyjbox_option == "--profile":
+                profile_destination = "stderr"
+            elif pyjbox_option == "--serve":
+                run_server = True
+            elif pyjbox_option == "--socket" and script_params:
+                serve_options["socket_path"] = script_params.pop(0)
+            elif pyjbox_option == "--workers" and script_params:
+                serve_options["max_workers"] = int(script_params.pop(0))
+            else:
+                print(f"pyjbox: unknown option {pyjbox_option}")
+                sys.exit(-2)
+        if run_server:
+            from pyjunix.server import serve
+            # Have everything imported before the server starts forking
+            script_dir.load_all()
+            serve(main, **serve_options)
+            return
     else:
-        script_to_run = sys.argv[0]
-        script_params = sys.argv
+        script_params = argv
+        
+    stages = split_pipeline(script_params)
+    if not all(stages):
+        print("pyjbox: empty pipeline stage")
+        sys.exit(-2)
         
-    script_to_run = script_to_run.lower().replace("./","").replace(".py","")
-    result = script_dir[script_to_run](script_params)()
-    sys.stdout.write(result)
+    if profile_destination:
+        start_profiling()
+    try:
+        if len(stages) == 1:
+            result = get_script(stages[0][0])(stages[0])()
+        else:
+            result = run_pipeline(stages, get_script)
+        write_result(result)
+    finally:
+        if profile_destination:
+            profile_record = stop_profiling()
+            profile_record["argv"] = script_params
+            write_profile(profile_record, profile_destination)
+    # Errors that did not stop the script (e.g. a file that could not be read) are reported through the exit status.
+    if get_exit_status():
+        sys.exit(get_exit_status())
     
+
+if __name__ == "__main__":
+    main(sys.argv)
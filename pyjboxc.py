@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Thin client to a ``pyjbox --serve`` server.
+
+It forwards its command line, working directory, ``PYJUNIX_*`` environment variables and ``stdin`` to the server and
+relays the ``stdout``, ``stderr`` and exit code of the call back. It is used exactly like ``pyjbox.py`` (including
+through symbolic links named after a script) and only imports the standard library, so that it starts quickly.
+
+If no server is listening, the call is handed over to ``pyjbox.py`` directly.
+
+See ``pyjunix/server.py`` for the protocol.
+"""
+
+import os
+import sys
+import json
+import socket
+import struct
+import threading
+
+FRAME_HEADER = struct.Struct("!cI")
+EXIT_CODE = struct.Struct("!i")
+
+
+def default_socket_path():
+    # Must agree with pyjunix.server.default_socket_path(), which is not imported to keep the client light.
+    return os.environ.get("PYJBOX_SOCKET",
+                          os.path.join(os.environ.get("XDG_RUNTIME_DIR", "/tmp"), f"pyjbox-{os.getuid()}.sock"))
+
+
+def recv_exactly(connection, n):
+    data = b""
+    while len(data) < n:
+        chunk = connection.recv(n - len(data))
+        if not chunk:
+            raise ConnectionError("pyjbox server closed the connection unexpectedly")
+        data += chunk
+    return data
+
+
+def pump_stdin(connection):
+    try:
+        while True:
+            chunk = os.read(sys.stdin.fileno(), 65536)
+            if not chunk:
+                break
+            connection.sendall(chunk)
+        connection.shutdown(socket.SHUT_WR)
+    except OSError:
+        # Either stdin is not readable or the call is over.
+        pass
+
+
+def main(argv):
+    # Calls through a symbolic link named after a script are forwarded as "pyjbox <script> ..."
+    script_name = os.path.basename(argv[0])
+    if "pyjboxc" in script_name:
+        call_argv = ["pyjbox"] + argv[1:]
+    else:
+        call_argv = ["pyjbox", script_name] + argv[1:]
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(default_socket_path())
+    except OSError:
+        pyjbox_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "pyjbox.py")
+        os.execv(sys.executable, [sys.executable, pyjbox_path] + call_argv[1:])
+
+    header = {"argv": call_argv,
+              "cwd": os.getcwd(),
+              "env": {k: v for k, v in os.environ.items() if k.startswith("PYJUNIX_")}}
+    connection.sendall(json.dumps(header).encode("utf-8") + b"\n")
+    threading.Thread(target=pump_stdin, args=(connection,), daemon=True).start()
+
+    outputs = {b"o": sys.stdout.buffer, b"e": sys.stderr.buffer}
+    while True:
+        channel, length = FRAME_HEADER.unpack(recv_exactly(connection, FRAME_HEADER.size))
+        payload = recv_exactly(connection, length)
+        if channel == b"x":
+            return EXIT_CODE.unpack(payload)[0]
+        outputs[channel].write(payload)
+        outputs[channel].flush()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,23 +1,23 @@
 """
 Module access for subsequent PyJUnix directives.
 
+Script classes are imported on first access (e.g. ``from pyjunix import PyJSort``), so that using one script does 
+not pay for importing the dependencies of all the others.
+
 :authors: Athanasios Anastasiou
 :date: September 2019
 
 """
 
-from .pyjkeys import PyJKeys
-from .pyjarray import PyJArray
-from .pyjunarray import PyJUnArray
-from .pyjls import PyJLs
-from .pyjgrep import PyJGrep
-from .pyjprtprn import PyJPrtPrn
-from .pyjsort import PyJSort
-from .pyjlast import PyJLast
-from .pyjps import PyJPs
-from .pyjjoin import PyJJoin
-from .pyjpaste import PyJPaste
-from .pyjcat import PyJCat
-from .pyjsplit import PyJSplit
-from .pyjdiff import PyJDiff
-from .pyjuniq import PyJUniq
+import importlib
+from .registry import BUILTIN_SCRIPTS
+
+_SCRIPT_MODULES = {class_name: module_name for module_name, class_name in BUILTIN_SCRIPTS.values()}
+
+__all__ = list(_SCRIPT_MODULES)
+
+
+def __getattr__(name):
+    if name in _SCRIPT_MODULES:
+        return getattr(importlib.import_module(_SCRIPT_MODULES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,16 +6,1481 @@ Sets up the core objects fro PyJUnix such as the base object for commands and th
 
 """
 
+import os
+import re
 import sys
 import json
 import io
+import time
+import hashlib
 import argparse
+import contextlib
+import collections
+import collections.abc
+
+
+# The formats that a streamed result can be encoded to (see ``encode_stream()``).
+STREAM_FORMATS = ("json", "ndjson")
+# The ways a stream of JSON items can be read (see ``iter_json_items()``).
+READ_MODES = ("auto", "array", "values", "list")
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# Characters that may still extend a number whose text happens to be cut short by the end of a chunk.
+_JSON_NUMBER_TAIL = re.compile(r"[0-9.eE+\-]*\Z")
+# Everything up to the next bracket that is not within a string.
+_JSON_SKIP = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*')
+_JSON_DECODER = json.JSONDecoder()
+# The canonical form of a value (see ``json_canonical()``).
+_JSON_CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"), check_circular=False)
 
 
 class PyJUnixException(Exception):
     pass
     
 
+class JSONCodec:
+    """
+    Encodes and decodes JSON using Python's standard library ``json`` module.
+    
+    This is the reference codec. Its output is what ``json.dumps()`` produces. Accelerated codecs derive from it and 
+    fall back to it for anything their backend can not handle (e.g. integers that do not fit in 64 bits or 
+    indentation levels other than 2).
+    """
+    
+    name = "stdlib"
+    
+    def dumps(self, obj, indent=None, sort_keys=False):
+        """
+        Encodes ``obj`` to a JSON string.
+        """
+        return json.dumps(obj, indent=indent, sort_keys=sort_keys)
+        
+    def loads(self, json_str):
+        """
+        Decodes a JSON string.
+        """
+        return json.loads(json_str)
+        
+    def load(self, fd):
+        """
+        Decodes the contents of a text stream.
+        """
+        return self.loads(fd.read())
+        
+        
+class OrjsonCodec(JSONCodec):
+    """
+    JSON codec backed by `orjson <https://github.com/ijl/orjson>`_.
+    """
+    
+    name = "orjson"
+    
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        
+    def dumps(self, obj, indent=None, sort_keys=False):
+        if indent not in (None, 2):
+            return super().dumps(obj, indent=indent, sort_keys=sort_keys)
+        option = self._orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= self._orjson.OPT_SORT_KEYS
+        if indent:
+            option |= self._orjson.OPT_INDENT_2
+        try:
+            return self._orjson.dumps(obj, option=option).decode("utf-8")
+        except TypeError:
+            return super().dumps(obj, indent=indent, sort_keys=sort_keys)
+            
+    def loads(self, json_str):
+        try:
+            return self._orjson.loads(json_str)
+        except self._orjson.JSONDecodeError:
+            return super().loads(json_str)
+            
+            
+class UjsonCodec(JSONCodec):
+    """
+    JSON codec backed by `ujson <https://github.com/ultrajson/ultrajson>`_.
+    """
+    
+    name = "ujson"
+    
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+        
+    def dumps(self, obj, indent=None, sort_keys=False):
+        try:
+            return self._ujson.dumps(obj, indent=indent or 0, sort_keys=sort_keys, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            return super().dumps(obj, indent=indent, sort_keys=sort_keys)
+            
+    def loads(self, json_str):
+        try:
+            return self._ujson.loads(json_str)
+        except ValueError:
+            return super().loads(json_str)
+            
+            
+class SimdjsonCodec(JSONCodec):
+    """
+    JSON codec backed by `pysimdjson <https://github.com/TkTech/pysimdjson>`_.
+    
+    simdjson only decodes JSON, encoding is left to the standard library.
+    """
+    
+    name = "simdjson"
+    
+    def __init__(self):
+        import simdjson
+        self._simdjson = simdjson
+        
+    def loads(self, json_str):
+        try:
+            return self._simdjson.loads(json_str)
+        except ValueError:
+            return super().loads(json_str)
+            
+
+# Available codecs, in order of preference when selecting one automatically.
+JSON_CODECS = {"orjson": OrjsonCodec, 
+               "ujson": UjsonCodec, 
+               "simdjson": SimdjsonCodec, 
+               "stdlib": JSONCodec}
+               
+_json_codec = None
+
+
+def set_json_codec(codec_name="auto"):
+    """
+    Selects the codec that is used by all PyJUnix scripts to encode and decode JSON.
+    
+    :param codec_name: One of the keys of ``JSON_CODECS``, or ``auto`` to select the first one that is installed.
+    :type codec_name: str
+    :returns: The selected codec.
+    :rtype: JSONCodec
+    :raises PyJUnixException: If the requested codec is unknown or its backend is not installed.
+    """
+    global _json_codec
+    if codec_name == "auto":
+        for a_codec in JSON_CODECS.values():
+            try:
+                _json_codec = a_codec()
+                break
+            except ImportError:
+                pass
+        return _json_codec
+        
+    if codec_name not in JSON_CODECS:
+        raise PyJUnixException(f"Unknown JSON codec {codec_name}, expected auto or one of "
+                               f"{', '.join(JSON_CODECS.keys())}")
+    try:
+        _json_codec = JSON_CODECS[codec_name]()
+    except ImportError:
+        raise PyJUnixException(f"JSON codec {codec_name} is not installed")
+    return _json_codec
+    
+    
+def get_json_codec():
+    """
+    Returns the codec in use, selecting it from the ``PYJUNIX_JSON_CODEC`` environment variable (default ``stdlib``) on 
+    first use.
+    
+    :rtype: JSONCodec
+    """
+    if _json_codec is None:
+        # The accelerated codecs format their output differently, therefore they are only used if requested.
+        return set_json_codec(os.environ.get("PYJUNIX_JSON_CODEC", "stdlib"))
+    return _json_codec
+    
+    
+def json_dumps(obj, indent=None, sort_keys=False):
+    """
+    Encodes ``obj`` to a JSON string with the codec in use.
+    """
+    return get_json_codec().dumps(obj, indent=indent, sort_keys=sort_keys)
+    
+    
+def json_loads(json_str):
+    """
+    Decodes a JSON string with the codec in use.
+    """
+    return get_json_codec().loads(json_str)
+    
+    
+def json_canonical(value):
+    """
+    Returns the canonical encoding of a decoded JSON value (compact, with sorted keys and ASCII only).
+    
+    Values have the same canonical encoding if and only if they are equal as JSON, regardless of the order of the keys 
+    of their objects. The type of each value is part of its encoding, therefore ``1``, ``1.0``, ``true`` and ``"1"`` 
+    are all encoded differently.
+    
+    The encoding is produced by the standard library in one pass in C, independently of the codec in use.
+    
+    :param value: A decoded JSON value.
+    :rtype: str
+    """
+    return _JSON_CANONICAL_ENCODER.encode(value)
+    
+    
+def json_hash(value):
+    """
+    Returns a hash of the structure of a decoded JSON value.
+    
+    The value is hashed through its canonical encoding (see ``json_canonical()``), therefore values hash the same if 
+    and only if they are equal as JSON. The hash is stable across codecs and processes.
+    
+    :param value: A decoded JSON value.
+    :returns: A 16 byte BLAKE2b digest.
+    :rtype: bytes
+    """
+    return hashlib.blake2b(_JSON_CANONICAL_ENCODER.encode(value).encode("ascii"), digest_size=16).digest()
+    
+    
+def json_load(fd):
+    """
+    Decodes the contents of a text stream with the codec in use.
+    
+    If ``fd`` is the input of an in-process pipeline stage (see ``PyJPipelineInput``), the result of the previous stage 
+    is returned as is, without encoding and decoding it.
+    """
+    if isinstance(fd, PyJPipelineInput):
+        return fd.document()
+    if _profiler is None:
+        return get_json_codec().load(fd)
+    with _profiler.phase("decode"):
+        json_str = fd.read()
+        _profiler.count("bytes_in", _utf8_len(json_str))
+        _profiler.count("items_in")
+        return get_json_codec().loads(json_str)
+    
+    
+class _NotCompilable(Exception):
+    """
+    Raised while compiling a JSONPath expression that uses features outside of the natively supported subset.
+    """
+    
+    
+def _is_mapping(value):
+    return type(value) is dict or isinstance(value, collections.abc.Mapping)
+    
+    
+def _is_sequence(value):
+    return type(value) is list or (isinstance(value, collections.abc.Sequence) and not isinstance(value, str))
+    
+    
+def _compile_array_index(index):
+    """
+    Returns a matcher that appends item ``index`` of a sequence (if it exists) to a list of matches.
+    """
+    def match_array_index(root_value, current_value, matches):
+        if _is_sequence(current_value):
+            if index < 0:
+                if 0 <= index + len(current_value):
+                    matches.append(current_value[index])
+            elif index < len(current_value):
+                matches.append(current_value[index])
+    return match_array_index
+    
+    
+def _compile_subscript(subscript):
+    """
+    Returns a matcher ``f(root_value, current_value, matches)`` that appends the values selected by a ``jsonpath2`` 
+    subscript to ``matches``, in the order that ``jsonpath2`` would produce them.
+    """
+    from jsonpath2.subscripts.objectindex import ObjectIndexSubscript
+    from jsonpath2.subscripts.arrayindex import ArrayIndexSubscript
+    from jsonpath2.subscripts.arrayslice import ArraySliceSubscript
+    from jsonpath2.subscripts.wildcard import WildcardSubscript
+    from jsonpath2.subscripts.filter import FilterSubscript
+    
+    subscript_type = type(subscript)
+    if subscript_type is ObjectIndexSubscript:
+        key = subscript.index
+        def match_object_index(root_value, current_value, matches):
+            if _is_mapping(current_value) and key in current_value:
+                matches.append(current_value[key])
+        return match_object_index
+        
+    if subscript_type is ArrayIndexSubscript:
+        return _compile_array_index(subscript.index)
+        
+    if subscript_type is WildcardSubscript:
+        def match_wildcard(root_value, current_value, matches):
+            if _is_mapping(current_value):
+                matches.extend(current_value.values())
+            elif _is_sequence(current_value):
+                matches.extend(current_value)
+        return match_wildcard
+        
+    if subscript_type is ArraySliceSubscript:
+        start, end, step = subscript.start, subscript.end, subscript.step
+        def match_array_slice(root_value, current_value, matches):
+            if not _is_sequence(current_value):
+                return
+            length = len(current_value)
+            # Index arithmetic exactly as in jsonpath2's ArraySliceSubscript (which is not quite Python's slicing). 
+            # The resulting indices are then treated as array index subscripts, so they may still wrap around.
+            slice_start = 0 if start is None else (
+                start + ((length if abs(start) < length else abs(start)) if start < 0 else 0))
+            slice_end = length if end is None else end + (length if end < 0 else 0)
+            for an_index in range(slice_start, slice_end, 1 if step is None else step):
+                if an_index < 0:
+                    if 0 <= an_index + length:
+                        matches.append(current_value[an_index])
+                elif an_index < length:
+                    matches.append(current_value[an_index])
+        return match_array_slice
+        
+    if subscript_type is FilterSubscript:
+        predicate = _compile_expression(subscript.expression)
+        def match_filter(root_value, current_value, matches):
+            if predicate(root_value, current_value):
+                matches.append(current_value)
+        return match_filter
+        
+    raise _NotCompilable(subscript_type.__name__)
+    
+    
+def _compile_steps(node):
+    """
+    Compiles the chain of subscripts that follows a ``$`` or ``@`` to a list of steps.
+    
+    Each step is a function ``f(root_value, current_values)`` that returns the list of values selected from each one of 
+    ``current_values`` in turn. Applying the steps one after the other produces the values in the same (depth first) 
+    order as ``jsonpath2``.
+    """
+    from jsonpath2.nodes.subscript import SubscriptNode
+    from jsonpath2.nodes.terminal import TerminalNode
+    
+    steps = []
+    while type(node) is not TerminalNode:
+        if type(node) is not SubscriptNode:
+            raise _NotCompilable(type(node).__name__)
+        matchers = [_compile_subscript(a_subscript) for a_subscript in node.subscripts]
+        if len(matchers) == 1:
+            matcher = matchers[0]
+            def step(root_value, current_values, matcher=matcher):
+                matches = []
+                for a_value in current_values:
+                    matcher(root_value, a_value, matches)
+                return matches
+        else:
+            def step(root_value, current_values, matchers=matchers):
+                matches = []
+                for a_value in current_values:
+                    for a_matcher in matchers:
+                        a_matcher(root_value, a_value, matches)
+                return matches
+        steps.append(step)
+        node = node.next_node
+    return steps
+    
+    
+def _compile_path(node):
+    """
+    Compiles a ``$`` or ``@`` path to a function ``f(root_value, current_value)`` that returns the list of values it 
+    selects.
+    """
+    from jsonpath2.nodes.root import RootNode
+    from jsonpath2.nodes.current import CurrentNode
+    
+    if type(node) not in (RootNode, CurrentNode):
+        raise _NotCompilable(type(node).__name__)
+    from_root = type(node) is RootNode
+    steps = _compile_steps(node.next_node)
+    
+    def select(root_value, current_value):
+        values = [root_value if from_root else current_value]
+        for a_step in steps:
+            values = a_step(root_value, values)
+            if not values:
+                break
+        return values
+    return select
+    
+    
+def _compile_operand(node_or_value):
+    """
+    Compiles an operand of a filter expression to a function that returns the list of values it stands for.
+    """
+    from jsonpath2.node import Node
+    
+    if isinstance(node_or_value, Node):
+        return _compile_path(node_or_value)
+    return lambda root_value, current_value: [node_or_value]
+    
+    
+def _compile_expression(expression):
+    """
+    Compiles a ``jsonpath2`` filter expression to a predicate ``f(root_value, current_value)``.
+    
+    Comparisons are carried out by the callbacks of the ``jsonpath2`` operators themselves, so that they behave 
+    identically.
+    """
+    from jsonpath2.node import Node
+    from jsonpath2.expressions.operator import (BinaryOperatorExpression, NotUnaryOperatorExpression, 
+                                                AndVariadicOperatorExpression, OrVariadicOperatorExpression)
+    from jsonpath2.expressions.some import SomeExpression
+    
+    if isinstance(expression, BinaryOperatorExpression):
+        compare = expression.callback
+        left = _compile_operand(expression.left_node_or_value)
+        right = _compile_operand(expression.right_node_or_value)
+        if isinstance(expression.right_node_or_value, Node):
+            # jsonpath2 evaluates a path on the right hand side to a generator, which is exhausted by the first left 
+            # hand side value. Any other left hand side values are therefore never compared.
+            def binary_predicate(root_value, current_value):
+                left_values = left(root_value, current_value)
+                if not left_values:
+                    return False
+                return any(compare(left_values[0], a_right_value) 
+                           for a_right_value in right(root_value, current_value))
+        else:
+            right_value = expression.right_node_or_value
+            def binary_predicate(root_value, current_value):
+                return any(compare(a_left_value, right_value) for a_left_value in left(root_value, current_value))
+        return binary_predicate
+        
+    if type(expression) is NotUnaryOperatorExpression:
+        operand = _compile_expression(expression.expression)
+        return lambda root_value, current_value: not operand(root_value, current_value)
+        
+    if type(expression) in (AndVariadicOperatorExpression, OrVariadicOperatorExpression):
+        combine = all if type(expression) is AndVariadicOperatorExpression else any
+        operands = [_compile_expression(an_expression) for an_expression in expression.expressions]
+        return lambda root_value, current_value: combine(an_operand(root_value, current_value) 
+                                                         for an_operand in operands)
+        
+    if type(expression) is SomeExpression:
+        if isinstance(expression.next_node_or_value, Node):
+            operand = _compile_path(expression.next_node_or_value)
+            return lambda root_value, current_value: bool(operand(root_value, current_value))
+        value = bool(expression.next_node_or_value)
+        return lambda root_value, current_value: value
+        
+    raise _NotCompilable(type(expression).__name__)
+    
+    
+class CompiledJSONPath:
+    """
+    A JSONPath expression, ready to be applied to documents.
+    
+    Expressions that only use child, index, wildcard and slice subscripts and filters over them (e.g. ``$.user``, 
+    ``$[*].pid``, ``$.a.b[3]``, ``$[?(@.pid > 1)]``) are compiled to plain Python functions that index into the document
+    directly. Anything else (e.g. recursive descent or ``length()``) is matched by ``jsonpath2`` itself. Both produce 
+    exactly the same values, in the same order.
+    """
+    
+    def __init__(self, path):
+        """
+        :param path: The parsed expression.
+        :type path: jsonpath2.Path
+        """
+        self.path = path
+        try:
+            self._select = _compile_path(path.root_node)
+        except _NotCompilable:
+            self._select = None
+            
+    @property
+    def is_native(self):
+        """
+        Whether the expression was compiled natively (rather than falling back to ``jsonpath2``).
+        """
+        return self._select is not None
+        
+    def values(self, document):
+        """
+        Returns the values that the expression selects from ``document``.
+        
+        :param document: A decoded JSON document.
+        :rtype: list
+        """
+        if self._select is not None:
+            return self._select(document, document)
+        return [a_match.current_value for a_match in self.path.match(document)]
+        
+    def match(self, document):
+        """
+        Matches the expression against ``document``, exactly like ``jsonpath2.Path.match()``.
+        """
+        return self.path.match(document)
+        
+    def __str__(self):
+        return str(self.path)
+        
+        
+def _get_jsonpath2_version():
+    """
+    Returns the installed version of ``jsonpath2``.
+    
+    The version is read off the name of the ``.dist-info`` directory next to the package when possible, as importing 
+    ``importlib.metadata`` costs more than parsing most expressions.
+    """
+    import jsonpath2
+    site_dir = os.path.dirname(os.path.dirname(jsonpath2.__file__))
+    for an_entry in os.listdir(site_dir):
+        if an_entry.startswith("jsonpath2-") and an_entry.endswith(".dist-info"):
+            return an_entry[len("jsonpath2-"):-len(".dist-info")]
+    from importlib.metadata import version
+    return version("jsonpath2")
+    
+    
+class JSONPathCache:
+    """
+    Keeps compiled JSONPath expressions, so that each distinct expression is parsed only once.
+    
+    Compiled expressions are held in memory in least recently used order and, if ``cache_dir`` is set, are also stored 
+    on disk so that subsequent invocations of a script with the same expression do not have to parse it again. Stored 
+    expressions are keyed by the expression string and the version of ``jsonpath2`` that compiled them.
+    """
+    
+    def __init__(self, max_size=256, cache_dir=None):
+        """
+        :param max_size: Maximum number of compiled expressions held in memory.
+        :type max_size: int
+        :param cache_dir: Directory to store compiled expressions in (``None`` to keep them in memory only).
+        :type cache_dir: str
+        """
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self._compiled = collections.OrderedDict()
+        self._library_version = None
+        
+    def _get_store_path(self, expression):
+        import hashlib
+        if self._library_version is None:
+            self._library_version = _get_jsonpath2_version()
+        expression_hash = hashlib.blake2b(expression.encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, f"jsonpath2-{self._library_version}", f"{expression_hash}.pickle")
+        
+    def _load(self, expression):
+        import pickle
+        store_path = self._get_store_path(expression)
+        try:
+            with open(store_path, "rb") as fd:
+                stored_expression, compiled = pickle.load(fd)
+        except Exception:
+            # A damaged entry is simply compiled (and stored) again.
+            return None
+        # Guard against hash collisions.
+        return compiled if stored_expression == expression else None
+        
+    def _store(self, expression, compiled):
+        import pickle
+        import tempfile
+        store_path = self._get_store_path(expression)
+        try:
+            os.makedirs(os.path.dirname(store_path), exist_ok=True)
+            # Written to a temporary file first, so that concurrent readers never see a partial entry.
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(store_path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as temp_fd:
+                pickle.dump((expression, compiled), temp_fd, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, store_path)
+        except (OSError, pickle.PicklingError):
+            # The cache is an optimisation, failing to store to it is not an error.
+            pass
+            
+    def get(self, expression):
+        """
+        Returns the compiled form of ``expression``, compiling it if it has not been seen before.
+        
+        :param expression: A JSONPath expression.
+        :type expression: str
+        :rtype: CompiledJSONPath
+        :raises ValueError: If ``expression`` is not a valid JSONPath expression.
+        """
+        compiled = self._compiled.get(expression)
+        if compiled is not None:
+            self._compiled.move_to_end(expression)
+            return compiled
+            
+        path = None
+        if self.cache_dir:
+            path = self._load(expression)
+        if path is None:
+            import jsonpath2
+            path = jsonpath2.Path.parse_str(expression)
+            if self.cache_dir:
+                self._store(expression, path)
+                
+        compiled = CompiledJSONPath(path)
+        self._compiled[expression] = compiled
+        if len(self._compiled) > self.max_size:
+            self._compiled.popitem(last=False)
+        return compiled
+        
+    def clear(self):
+        """
+        Empties the in-memory cache (entries stored on disk are kept).
+        """
+        self._compiled.clear()
+        
+        
+_jsonpath_cache = None
+
+
+def get_jsonpath_cache():
+    """
+    Returns the cache of compiled JSONPath expressions, storing them in the ``PYJUNIX_CACHE_DIR`` directory if that 
+    environment variable is set.
+    
+    :rtype: JSONPathCache
+    """
+    global _jsonpath_cache
+    cache_dir = os.environ.get("PYJUNIX_CACHE_DIR") or None
+    if _jsonpath_cache is None:
+        _jsonpath_cache = JSONPathCache(cache_dir=cache_dir)
+    else:
+        _jsonpath_cache.cache_dir = cache_dir
+    return _jsonpath_cache
+    
+    
+def compile_jsonpath(expression):
+    """
+    Returns the compiled form of a JSONPath expression, through the cache of compiled expressions.
+    
+    Scripts that accept JSONPath expressions should compile them through this function rather than calling 
+    ``jsonpath2.Path.parse_str()`` directly.
+    
+    :param expression: A JSONPath expression.
+    :type expression: str
+    :rtype: CompiledJSONPath
+    :raises ValueError: If ``expression`` is not a valid JSONPath expression.
+    """
+    if _jsonpath_cache is None:
+        get_jsonpath_cache()
+    return _jsonpath_cache.get(expression)
+    
+    
+def compile_record_jsonpath(expression):
+    """
+    Compiles a JSONPath expression that is applied to each item of a list (or each value of newline delimited JSON) 
+    separately.
+    
+    The expression can be given either over the whole list (e.g. ``$[*].pid``), in which case it is applied to each 
+    item as ``$.pid``, or over each item (e.g. ``$.pid``).
+    
+    :param expression: A JSONPath expression.
+    :type expression: str
+    :rtype: CompiledJSONPath
+    :raises ValueError: If ``expression`` is not a valid JSONPath expression.
+    """
+    record_expression = str(compile_jsonpath(expression))
+    if record_expression.startswith("$[*]"):
+        record_expression = "$" + record_expression[len("$[*]"):]
+    return compile_jsonpath(record_expression)
+    
+    
+class PyJProfiler:
+    """
+    Accounts for the time and memory that a call spends in each of its phases.
+    
+    The phases are ``parse_args`` (parsing the command line), ``decode`` (reading and decoding JSON input), ``exec`` 
+    (the work of the ``on_exec_*()`` functions), ``encode`` (encoding and writing the result) and ``other`` (anything 
+    else, e.g. importing a script). Phases nest: A script that decodes its input while it executes has that time 
+    accounted for as ``decode`` rather than ``exec``, so that the time of all phases adds up to the time of the call.
+    
+    Memory is accounted for as the peak of the memory allocated by Python (through ``tracemalloc``) within each phase.
+    """
+    
+    COUNTERS = ("items_in", "items_out", "bytes_in", "bytes_out")
+    
+    def __init__(self, trace_memory=True):
+        """
+        :param trace_memory: Whether to also account for peak memory use (which slows the call down considerably).
+        :type trace_memory: bool
+        """
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self._stack = ["other"]
+        self._started_tracing = False
+        self._start_wall = self._last_wall = None
+        self._start_cpu = self._last_cpu = None
+        
+    def _charge(self):
+        """
+        Charges the time (and peak memory) since the last phase change to the phase that is running.
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        stats = self.phases.get(self._stack[-1])
+        if stats is None:
+            stats = self.phases[self._stack[-1]] = {"wall_seconds": 0.0, "cpu_seconds": 0.0}
+        stats["wall_seconds"] += wall - self._last_wall
+        stats["cpu_seconds"] += cpu - self._last_cpu
+        if self._started_tracing:
+            import tracemalloc
+            peak = tracemalloc.get_traced_memory()[1]
+            stats["tracemalloc_peak_bytes"] = max(stats.get("tracemalloc_peak_bytes", 0), peak)
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        self._last_wall, self._last_cpu = wall, cpu
+        
+    def start(self):
+        """
+        Starts accounting, in the ``other`` phase.
+        """
+        import tracemalloc
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start_wall = self._last_wall = time.perf_counter()
+        self._start_cpu = self._last_cpu = time.process_time()
+        
+    def enter(self, phase_name):
+        """
+        Switches to ``phase_name`` until the matching ``exit()``.
+        """
+        self._charge()
+        self._stack.append(phase_name)
+        
+    def exit(self):
+        """
+        Switches back to the phase that was running before the last ``enter()``.
+        """
+        self._charge()
+        self._stack.pop()
+        
+    @contextlib.contextmanager
+    def phase(self, phase_name):
+        """
+        Accounts for the time spent within a ``with`` block as ``phase_name``.
+        """
+        self.enter(phase_name)
+        try:
+            yield self
+        finally:
+            self.exit()
+            
+    def count(self, counter_name, n=1):
+        """
+        Adds ``n`` to one of the ``COUNTERS``.
+        """
+        self.counters[counter_name] += n
+        
+    def stop(self):
+        """
+        Stops accounting and returns the record of the call.
+        
+        :rtype: dict
+        """
+        self._charge()
+        record = {"pid": os.getpid(),
+                  "wall_seconds": time.perf_counter() - self._start_wall,
+                  "cpu_seconds": time.process_time() - self._start_cpu,
+                  "phases": self.phases}
+        record.update(self.counters)
+        if self._started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self._started_tracing = False
+        return record
+        
+        
+_profiler = None
+
+
+def start_profiling(trace_memory=True):
+    """
+    Starts profiling every call that follows, until ``stop_profiling()``.
+    
+    :rtype: PyJProfiler
+    """
+    global _profiler
+    _profiler = PyJProfiler(trace_memory)
+    _profiler.start()
+    return _profiler
+    
+    
+def stop_profiling():
+    """
+    Stops profiling.
+    
+    :returns: The record of the calls made since ``start_profiling()``, or ``None`` if profiling was not on.
+    :rtype: dict
+    """
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler.stop() if profiler is not None else None
+    
+    
+def write_profile(record, destination="stderr"):
+    """
+    Writes a profile record as a line of JSON to ``stderr`` or appends it to a file.
+    
+    :param destination: ``stderr`` (or ``1``) or the path of the file to append to.
+    :type destination: str
+    """
+    record_line = json.dumps(record)
+    if destination in ("stderr", "1"):
+        print(record_line, file=sys.stderr)
+    else:
+        with open(destination, "at", encoding="utf-8") as fd:
+            fd.write(record_line + "\n")
+            
+            
+def profile_phase(phase_name):
+    """
+    Returns a context manager that accounts for the time spent within it as ``phase_name``, if profiling is on.
+    """
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.phase(phase_name)
+    
+    
+def _profile_items(items, phase_name, counter_name=None):
+    """
+    Accounts for the time spent producing each one of ``items`` as ``phase_name`` and counts them.
+    """
+    profiler = _profiler
+    while True:
+        profiler.enter(phase_name)
+        try:
+            an_item = next(items)
+        except StopIteration:
+            return
+        finally:
+            profiler.exit()
+        if counter_name is not None:
+            profiler.count(counter_name)
+        yield an_item
+        
+        
+def _utf8_len(text):
+    return len(text.encode("utf-8", "surrogatepass"))
+    
+    
+class _ChunkedJSONReader:
+    """
+    A read buffer over a text stream that decodes one JSON value at a time.
+    
+    Only the part of the stream that has not been decoded yet is kept in memory, which is at most the size of the 
+    value that is currently being decoded plus one chunk.
+    """
+    
+    def __init__(self, fd, chunk_size, track_offsets=False):
+        self._fd = fd
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        # With track_offsets, bytes are counted up to _mark, the buffer position of offset _mark_offset.
+        self._track_offsets = track_offsets
+        self._mark = 0
+        self._mark_offset = 0
+        
+    def _fill(self, min_size=0):
+        """
+        Discards what has already been decoded and appends the next chunk of the stream to the buffer.
+        
+        :returns: False if the stream is exhausted, True otherwise.
+        """
+        if self._eof:
+            return False
+        chunk = self._fd.read(max(self._chunk_size, min_size))
+        if not chunk:
+            self._eof = True
+            return False
+        if _profiler is not None:
+            _profiler.count("bytes_in", _utf8_len(chunk))
+        if self._track_offsets:
+            self.tell()
+            self._mark = 0
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+        
+    def peek(self):
+        """
+        Skips whitespace and returns the next character in the stream without consuming it ("" at the end).
+        """
+        while True:
+            self._pos = _JSON_WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+                
+    def advance(self):
+        """
+        Consumes the character returned by the last ``peek()``.
+        """
+        self._pos += 1
+        
+    def skip(self):
+        """
+        Moves past the JSON value that starts at the current position, without decoding it.
+        
+        Arrays and objects are skipped by matching their brackets, so their contents are not checked for validity.
+        """
+        if self.peek() not in ("[", "{"):
+            self.value()
+            return
+        depth = 0
+        while True:
+            pos = _JSON_SKIP.match(self._buffer, self._pos).end()
+            if pos == len(self._buffer) or self._buffer[pos] == '"':
+                # The end of the buffer, possibly in the middle of a string.
+                self._pos = pos
+                if not self._fill(len(self._buffer) - pos):
+                    raise self.error("Unterminated value")
+                continue
+            self._pos = pos + 1
+            if self._buffer[pos] in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if not depth:
+                    return
+                    
+    def tell(self):
+        """
+        Returns the offset of the current position from the start of the stream, in bytes of UTF-8 (only if the reader
+        tracks offsets).
+        """
+        self._mark_offset += _utf8_len(self._buffer[self._mark:self._pos])
+        self._mark = self._pos
+        return self._mark_offset
+        
+    def error(self, message):
+        """
+        Returns a ``json.JSONDecodeError`` for the current position in the buffer.
+        """
+        return json.JSONDecodeError(message, self._buffer, self._pos)
+        
+    def value(self):
+        """
+        Decodes and returns the JSON value that starts at the current position.
+        """
+        self.peek()
+        while True:
+            try:
+                value, value_end = _JSON_DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # The value may simply be incomplete. Read at least as much as is already buffered, so that very 
+                # large values are not re-scanned once per chunk.
+                if not self._fill(len(self._buffer) - self._pos):
+                    raise
+                continue
+            # A number that is cut short by the end of the buffer (e.g. "12" of "12.5e3") might continue in the next 
+            # chunk.
+            if _JSON_NUMBER_TAIL.match(self._buffer, value_end) and self._fill():
+                continue
+            self._pos = value_end
+            return value
+            
+
+def iter_json_items(fd, mode="auto", chunk_size=65536, with_offsets=False):
+    """
+    Reads the items of a JSON stream one at a time, without loading the whole stream in memory.
+    
+    The stream is read in chunks of ``chunk_size`` characters and memory use depends on the size of the largest item,
+    rather than the size of the stream.
+    
+    ``mode`` determines what is considered an item:
+    
+    * ``array``: The stream must contain a single top-level JSON array, whose elements are the items.
+    * ``values``: The stream contains one or more concatenated JSON values (e.g. newline delimited JSON) and each 
+      value is an item.
+    * ``auto``: If the stream starts with a top-level array its elements are the items, otherwise it is read as in 
+      ``values``.
+    * ``list``: As in ``auto``, but a stream that contains a single value other than an array is not a list of items 
+      and raises ``TypeError``. This is for scripts that expect a list at their input.
+      
+    If ``fd`` is the input of an in-process pipeline stage (see ``PyJPipelineInput``), the items are taken directly 
+    from the result of the previous stage.
+    
+    With ``with_offsets``, each item comes with the byte offsets of its start and end in the stream, so that it can be
+    read back later on (e.g. by ``pyjindex``). The stream must then be a UTF-8 file opened with ``newline=""``, so that 
+    characters map back to the bytes of the file.
+    
+    :param fd: A text stream (e.g. ``sys.stdin`` or a file opened in text mode).
+    :param mode: One of ``READ_MODES``.
+    :type mode: str
+    :param chunk_size: Number of characters to read at a time.
+    :type chunk_size: int
+    :param with_offsets: Whether to return the offsets of each item.
+    :type with_offsets: bool
+    :returns: A generator of decoded items, or of ``(item, start, end)`` tuples ``with_offsets``.
+    :raises TypeError: If ``mode`` is ``array`` and the stream does not contain an array, or ``mode`` is ``list`` and 
+                       the stream contains a single value that is not an array.
+    :raises json.JSONDecodeError: If the stream is not valid JSON.
+    """
+    items = _read_json_items(fd, mode, chunk_size, with_offsets)
+    # Items passed along an in-process pipeline are not decoded and are not accounted for.
+    if _profiler is not None and not isinstance(fd, PyJPipelineInput):
+        return _profile_items(items, "decode", "items_in")
+    return items
+    
+    
+def _read_json_items(fd, mode, chunk_size, with_offsets=False):
+    """
+    The generator behind ``iter_json_items()``.
+    """
+    if mode not in READ_MODES:
+        raise PyJUnixException(f"Unknown read mode {mode}, expected one of {', '.join(READ_MODES)}")
+        
+    if isinstance(fd, PyJPipelineInput):
+        if with_offsets:
+            raise PyJUnixException("Offsets are not available over an in-process pipeline")
+        yield from fd.items(mode)
+        return
+        
+    reader = _ChunkedJSONReader(fd, chunk_size, track_offsets=with_offsets)
+    if with_offsets:
+        def read_value():
+            reader.peek()
+            start = reader.tell()
+            value = reader.value()
+            return value, start, reader.tell()
+    else:
+        read_value = reader.value
+    first_char = reader.peek()
+    
+    if mode == "list" and first_char and first_char != "[":
+        first_value = read_value()
+        if not reader.peek():
+            raise TypeError(f"Expected a list in {getattr(fd, 'name', 'input')}, received "
+                            f"{type(first_value[0] if with_offsets else first_value)}")
+        yield first_value
+        
+    if mode == "values" or (mode in ("auto", "list") and first_char != "["):
+        while reader.peek():
+            yield read_value()
+        return
+        
+    if first_char != "[":
+        raise TypeError(f"Expected a JSON array in {getattr(fd, 'name', 'input')}")
+    reader.advance()
+    if reader.peek() == "]":
+        reader.advance()
+    else:
+        while True:
+            yield read_value()
+            next_char = reader.peek()
+            reader.advance()
+            if next_char == "]":
+                break
+            if next_char != ",":
+                raise reader.error("Expecting ',' delimiter")
+    if reader.peek():
+        raise reader.error("Extra data")
+        
+        
+def _get_prune_steps(path):
+    """
+    Returns the leading steps of a ``jsonpath2`` path that only select object keys, array indices or everything, as 
+    ``(wildcard, keys, indices)`` tuples.
+    
+    :returns: The steps, or ``None`` if the path refers to the root of the document again (e.g. in a filter), in which 
+              case the document can not be pruned.
+    """
+    from jsonpath2.nodes.subscript import SubscriptNode
+    from jsonpath2.subscripts.objectindex import ObjectIndexSubscript
+    from jsonpath2.subscripts.arrayindex import ArrayIndexSubscript
+    from jsonpath2.subscripts.wildcard import WildcardSubscript
+    
+    if str(path).count("$") > 1:
+        return None
+    steps = []
+    node = path.root_node.next_node
+    while type(node) is SubscriptNode:
+        wildcard = False
+        keys = set()
+        indices = set()
+        for a_subscript in node.subscripts:
+            if type(a_subscript) is ObjectIndexSubscript:
+                keys.add(a_subscript.index)
+            elif type(a_subscript) is ArrayIndexSubscript and a_subscript.index >= 0:
+                indices.add(a_subscript.index)
+            elif type(a_subscript) is WildcardSubscript:
+                wildcard = True
+            else:
+                return steps
+        steps.append((wildcard, frozenset(keys), frozenset(indices)))
+        node = node.next_node
+    return steps
+    
+    
+def _merge_prune_steps(steps_list):
+    """
+    Returns steps that select everything that any one of ``steps_list`` selects.
+    
+    Steps are merged level by level, up to the shortest of them (below which everything is selected).
+    """
+    if any(steps is None for steps in steps_list):
+        return None
+    merged_steps = []
+    for level_steps in zip(*steps_list):
+        merged_steps.append((any(wildcard for wildcard, keys, indices in level_steps),
+                             frozenset().union(*(keys for wildcard, keys, indices in level_steps)),
+                             frozenset().union(*(indices for wildcard, keys, indices in level_steps))))
+    return merged_steps
+    
+    
+def _prune_value(value, steps):
+    """
+    Leaves out what ``steps`` can not select from a decoded value (as ``_read_pruned()`` does while decoding).
+    """
+    if not steps:
+        return value
+    wildcard, keys, indices = steps[0]
+    if type(value) is dict:
+        return {a_key: _prune_value(a_value, steps[1:]) for a_key, a_value in value.items() 
+                if wildcard or a_key in keys}
+    if type(value) is list:
+        if wildcard:
+            return [_prune_value(a_value, steps[1:]) for a_value in value]
+        return [_prune_value(a_value, steps[1:]) if k in indices else None 
+                for k, a_value in enumerate(value[:max(indices, default=-1) + 1])]
+    return value
+    
+    
+def _read_pruned(reader, steps):
+    """
+    Decodes the JSON value at the current position of a reader, leaving out what ``steps`` can not select.
+    
+    Object members that are left out are dropped and array items are replaced by ``null``, up to the last index that 
+    can be selected, so that the remaining ones keep their index.
+    """
+    if not steps:
+        return reader.value()
+    wildcard, keys, indices = steps[0]
+    next_char = reader.peek()
+    
+    if next_char == "{":
+        pruned = {}
+        if not (wildcard or keys):
+            reader.skip()
+            return pruned
+        reader.advance()
+        if reader.peek() == "}":
+            reader.advance()
+            return pruned
+        while True:
+            if reader.peek() != '"':
+                raise reader.error("Expecting property name enclosed in double quotes")
+            key = reader.value()
+            if reader.peek() != ":":
+                raise reader.error("Expecting ':' delimiter")
+            reader.advance()
+            if wildcard or key in keys:
+                pruned[key] = _read_pruned(reader, steps[1:])
+            else:
+                reader.skip()
+            next_char = reader.peek()
+            reader.advance()
+            if next_char == "}":
+                return pruned
+            if next_char != ",":
+                raise reader.error("Expecting ',' delimiter")
+                
+    if next_char == "[":
+        pruned = []
+        if not (wildcard or indices):
+            reader.skip()
+            return pruned
+        reader.advance()
+        if reader.peek() == "]":
+            reader.advance()
+            return pruned
+        last_index = max(indices, default=-1)
+        k = 0
+        while True:
+            if wildcard:
+                # All items are needed, so each one is decoded as a whole (which is much faster than picking through 
+                # it) and then pruned. Only one item at a time is held in full.
+                pruned.append(_prune_value(reader.value(), steps[1:]))
+            elif k in indices:
+                pruned.append(_read_pruned(reader, steps[1:]))
+            else:
+                reader.skip()
+                if k < last_index:
+                    pruned.append(None)
+            k += 1
+            next_char = reader.peek()
+            reader.advance()
+            if next_char == "]":
+                return pruned
+            if next_char != ",":
+                raise reader.error("Expecting ',' delimiter")
+                
+    return reader.value()
+    
+    
+def iter_json_pruned(fd, jsonpath_exp, chunk_size=65536):
+    """
+    Reads the values of a JSON stream (as ``iter_json_items()`` does in ``values`` mode), decoding only the parts of 
+    each one that a JSONPath expression can select.
+    
+    The leading object keys, array indices and wildcards of the expression (e.g. ``metadata`` and ``owner`` of 
+    ``$.metadata.owner``) determine which parts of each value are decoded. Everything else is skipped over without 
+    building any objects, which saves both time and memory when the expression only selects a small part of a large
+    document. Applying the expression to the (pruned) values returns exactly what it returns over the whole values.
+    
+    If more than one expression is given, everything that any one of them can select is decoded.
+    
+    :param fd: A text stream (e.g. ``sys.stdin`` or a file opened in text mode).
+    :param jsonpath_exp: The expression (or a list of the expressions) that will be applied to the values.
+    :type jsonpath_exp: CompiledJSONPath
+    :param chunk_size: Number of characters to read at a time.
+    :type chunk_size: int
+    :returns: A generator of decoded (and pruned) values.
+    """
+    if isinstance(jsonpath_exp, CompiledJSONPath):
+        steps = _get_prune_steps(jsonpath_exp.path)
+    else:
+        steps = _merge_prune_steps([_get_prune_steps(an_exp.path) for an_exp in jsonpath_exp])
+    if steps is None or isinstance(fd, PyJPipelineInput):
+        return iter_json_items(fd, mode="values", chunk_size=chunk_size)
+    values = _read_pruned_values(fd, steps, chunk_size)
+    if _profiler is not None:
+        return _profile_items(values, "decode", "items_in")
+    return values
+    
+    
+def _read_pruned_values(fd, steps, chunk_size):
+    reader = _ChunkedJSONReader(fd, chunk_size)
+    while reader.peek():
+        yield _read_pruned(reader, steps)
+        
+        
+def encode_stream(items, stream_format="json"):
+    """
+    Encodes an iterable of items incrementally, one item at a time.
+    
+    With ``stream_format="json"`` the chunks put together form a JSON array that is byte-for-byte identical to what 
+    ``json_dumps(list(items))`` would have produced with the standard library codec. With ``stream_format="ndjson"`` every item is rendered in compact 
+    form on a line of its own (which is what ``PyJArray`` expects at its input).
+    
+    :param items: The items to encode.
+    :type items: iterable
+    :param stream_format: One of ``STREAM_FORMATS``.
+    :type stream_format: str
+    :returns: A generator of ``str`` chunks.
+    """
+    if stream_format not in STREAM_FORMATS:
+        raise PyJUnixException(f"Unknown stream format {stream_format}, expected one of {', '.join(STREAM_FORMATS)}")
+        
+    if stream_format == "ndjson":
+        for an_item in items:
+            yield json_dumps(an_item) + "\n"
+        return
+        
+    separator = ""
+    yield "["
+    for an_item in items:
+        yield separator + json_dumps(an_item)
+        separator = ", "
+    yield "]"
+    
+    
+_exit_status = 0
+
+
+def report_error(message, exit_status=1):
+    """
+    Reports an error that does not stop a script (e.g. one of several files that can not be read) to ``stderr``.
+    
+    The script carries on with the rest of its input, but ``pyjbox`` exits with ``exit_status`` once the result has 
+    been written (see ``get_exit_status()``).
+    
+    :param message: The description of the error.
+    :type message: str
+    :param exit_status: The status to exit with, unless an earlier error set one already.
+    :type exit_status: int
+    """
+    global _exit_status
+    print(message, file=sys.stderr)
+    _exit_status = _exit_status or exit_status
+    
+    
+def get_exit_status():
+    """
+    Returns the status that the process should exit with, non-zero if any error was reported by ``report_error()``.
+    
+    :rtype: int
+    """
+    return _exit_status
+    
+    
+def write_result(result, out_stream=None, batch_size=65536):
+    """
+    Writes the result of a script to an output stream.
+    
+    ``result`` is either a ``str`` or an iterable of ``str`` chunks (e.g. as returned by ``encode_stream()``). Chunks 
+    are gathered in batches of roughly ``batch_size`` characters and the stream is flushed after every batch, so that 
+    the next process in a pipe can start working while this one is still producing.
+    
+    :param result: The (encoded) result of a script.
+    :type result: str or iterable of str
+    :param out_stream: The stream to write to, by default ``sys.stdout``.
+    :param batch_size: Approximate number of characters to buffer before flushing.
+    :type batch_size: int
+    """
+    out_stream = out_stream or sys.stdout
+    profiler = _profiler
+    
+    def write(text):
+        out_stream.write(text)
+        if profiler is not None:
+            profiler.count("bytes_out", _utf8_len(text))
+            
+    with profile_phase("encode"):
+        if isinstance(result, str):
+            write(result)
+        else:
+            batch = []
+            batch_len = 0
+            for a_chunk in result:
+                batch.append(a_chunk)
+                batch_len += len(a_chunk)
+                if batch_len >= batch_size:
+                    write("".join(batch))
+                    out_stream.flush()
+                    batch = []
+                    batch_len = 0
+            write("".join(batch))
+        out_stream.flush()
+    
+
+class PyJPipelineInput(io.TextIOBase):
+    """
+    Stands in for ``sys.stdin`` of a script that runs as a stage of an in-process pipeline (see ``run_pipeline()``).
+    
+    It carries the (unencoded) result of the previous stage. ``json_load()`` and ``iter_json_items()`` recognise it 
+    and hand that result over directly. Any other use of it as a text stream (e.g. reading lines) receives the result 
+    encoded exactly as the previous stage would have written it to ``stdout``.
+    """
+    
+    name = "<stdin>"
+    
+    def __init__(self, data, stream_format="json"):
+        """
+        :param data: The result of the previous stage, a Python object or an iterator of streamed items.
+        :param stream_format: The ``stream_format`` of the previous stage, if ``data`` is streamed.
+        :type stream_format: str
+        """
+        super().__init__()
+        self._data = data
+        self._stream_format = stream_format
+        self._text = None
+        
+    def _is_streamed(self):
+        return isinstance(self._data, collections.abc.Iterator)
+        
+    def document(self):
+        """
+        Returns the result of the previous stage as a single document (streamed items are collected in a list).
+        """
+        if self._is_streamed():
+            return list(self._data)
+        return self._data
+        
+    def items(self, mode="auto"):
+        """
+        Returns an iterator over the result of the previous stage, as ``iter_json_items()`` would read it.
+        """
+        if self._is_streamed():
+            # A stream encoded as a JSON array is a single value
+            if mode == "values" and self._stream_format == "json":
+                return iter([list(self._data)])
+            return self._data
+        if mode == "list" and type(self._data) is not list:
+            raise TypeError(f"Expected a list in {self.name}, received {type(self._data)}")
+        if mode == "values" or (mode == "auto" and type(self._data) is not list):
+            return iter([self._data])
+        if type(self._data) is not list:
+            raise TypeError(f"Expected a JSON array in {self.name}")
+        return iter(self._data)
+        
+    def _text_stream(self):
+        if self._text is None:
+            if self._is_streamed():
+                self._text = io.StringIO("".join(encode_stream(self._data, self._stream_format)))
+            else:
+                self._text = io.StringIO(json_dumps(self._data))
+        return self._text
+        
+    def readable(self):
+        return True
+        
+    def read(self, size=-1):
+        return self._text_stream().read(size)
+        
+    def readline(self, size=-1):
+        return self._text_stream().readline(size)
+        
+        
+def _with_stdin(items, stdin):
+    """
+    Iterates over ``items`` with ``sys.stdin`` set to ``stdin`` while each item is being produced.
+    
+    Streamed stages of a pipeline run lazily, interleaved with each other, and each one must see its own input.
+    """
+    while True:
+        saved_stdin = sys.stdin
+        sys.stdin = stdin
+        try:
+            an_item = next(items)
+        except StopIteration:
+            return
+        finally:
+            sys.stdin = saved_stdin
+        yield an_item
+        
+        
+def run_pipeline(stages, script_lookup):
+    """
+    Runs a sequence of scripts in-process, as if their ``stdout`` was piped to the ``stdin`` of the next one.
+    
+    The result of each stage is passed to the next one as a Python object (through ``PyJPipelineInput``) and only the 
+    result of the last stage is encoded. Streamed results are passed along lazily, item by item.
+    
+    :param stages: The command line of each stage, with the script name as its first element.
+    :type stages: list of list of str
+    :param script_lookup: Maps the name of a script to its ``BasePyJUnixFunction`` class.
+    :type script_lookup: callable
+    :returns: The encoded result of the last stage (see ``BasePyJUnixFunction.__call__()``).
+    """
+    stage_result = None
+    stage_script = None
+    for stage_params in stages:
+        stage_stdin = sys.stdin
+        if stage_script is not None:
+            stage_stdin = PyJPipelineInput(stage_result, stage_script.stream_format)
+        saved_stdin = sys.stdin
+        sys.stdin = stage_stdin
+        try:
+            # Scripts are instantiated with their stdin in place, as file arguments (-) are opened while parsing.
+            stage_script = script_lookup(stage_params[0])(stage_params)
+            stage_result = stage_script.run()
+        finally:
+            sys.stdin = saved_stdin
+        if isinstance(stage_result, collections.abc.Iterator):
+            stage_result = _with_stdin(stage_result, stage_stdin)
+    return _encode_result(stage_script, stage_result)
+    
+    
+def _encode_result(script, exec_result):
+    """
+    Encodes the result of a script through its ``on_encode_result()``, accounting for it if profiling is on.
+    """
+    if _profiler is None:
+        return script.on_encode_result(exec_result)
+    if isinstance(exec_result, collections.abc.Iterator):
+        # The items of a streamed result are produced while the result is being written.
+        exec_result = _profile_items(exec_result, "exec", "items_out")
+    else:
+        _profiler.count("items_out", len(exec_result) if isinstance(exec_result, list) else 1)
+    with _profiler.phase("encode"):
+        return script.on_encode_result(exec_result)
+        
+        
 class PyJCommandLineArgumentParser(argparse.ArgumentParser):
     """
     Represents the command line arguments passed to a script along with basic functions to handle them.    
@@ -31,36 +1496,37 @@ class PyJCommandLineArgumentParser(argparse.ArgumentParser):
         def process_item(item_value):
             if not isinstance(item_value, io.IOBase):
                 if item_value.startswith(":"):
-                    return json.loads(item_value[1:])
+                    return json_loads(item_value[1:])
                 else:
                     # TODO: HIGH, I am trying to avoid a regexp validation here but maybe it is impossible.
                     #       Revise that `isprintable`
                     strp_value = item_value.lstrip("\"").rstrip("\"")
                     if strp_value.isnumeric():
-                        return json.loads(strp_value)
+                        return json_loads(strp_value)
                     elif strp_value.isprintable():
-                        return json.loads("\"%s\"" % strp_value)
+                        return json_loads("\"%s\"" % strp_value)
                     else:
                         # TODO: HIGH, At this point we should raise an exception that this input is invalid.
                         pass
             return item_value
                     
-        parsed_args_result = super().parse_args(args, namespace)
-        sub_values = {}
+        with profile_phase("parse_args"):
+            parsed_args_result = super().parse_args(args, namespace)
+            sub_values = {}
         
-        # There is no reason to reformat any type conversions that can already be handled by argparse.
-        # This part of the code makes sure that strings and JSON strings are stored internally as the objects
-        # they imply.
-        for var, var_value in vars(parsed_args_result).items():
-            if type(var_value) is list:
-                sub_values[var] = [process_item(u) for u in var_value]
-            elif type(var_value) is str:
-                sub_values[var] = process_item(var_value)
+            # There is no reason to reformat any type conversions that can already be handled by argparse.
+            # This part of the code makes sure that strings and JSON strings are stored internally as the objects
+            # they imply.
+            for var, var_value in vars(parsed_args_result).items():
+                if type(var_value) is list:
+                    sub_values[var] = [process_item(u) for u in var_value]
+                elif type(var_value) is str:
+                    sub_values[var] = process_item(var_value)
         
-        for var, var_value in sub_values.items():
-            setattr(parsed_args_result,var,var_value)
+            for var, var_value in sub_values.items():
+                setattr(parsed_args_result,var,var_value)
 
-        return parsed_args_result
+            return parsed_args_result
             
         
 class BasePyJUnixFunction:
@@ -69,8 +1535,26 @@ class BasePyJUnixFunction:
     
     It sets up the basic instantiation, argument validation and logic of execution so that actual functionality 
     can be implemented by deriving a small amount of functions.
+    
+    Scripts return their result from ``on_exec_*()`` as a Python object and the framework encodes it to JSON. They can 
+    also return a generator (e.g. by ``yield`` ing from ``on_exec_over_stdin()``) of items. In that case, the items are
+    encoded one at a time as they are produced, according to ``stream_format``. The default format is a JSON array and can be 
+    switched to newline delimited JSON through the ``PYJUNIX_STREAM_FORMAT`` environment variable or the ``--ndjson`` 
+    option of ``pyjbox``.
+    
+    Scripts should read their input through ``json_load()`` or ``iter_json_items()`` so that, when they run as a stage of
+    an in-process pipeline (see ``run_pipeline()``), they receive the result of the previous stage without it being 
+    encoded and decoded in between.
+    
+    Note:
+        ``on_exec_over_params()`` signals that it did not handle the call by returning ``None``. A generator 
+        function can not do that, therefore ``on_exec_over_params()`` should **return** a generator rather than be 
+        one, unless the script always operates over its parameters.
     """
     
+    # How streamed results are encoded. One of ``STREAM_FORMATS``.
+    stream_format = os.environ.get("PYJUNIX_STREAM_FORMAT", "json")
+    
     def __init__(self, sys_args):
         """
         Initialises the script through a list of parameters.
@@ -149,25 +1633,66 @@ class BasePyJUnixFunction:
         """
         return exec_result
         
+    def on_encode_result(self, exec_result):
+        """
+        Encodes the result of the script to JSON.
+        
+        :param exec_result: The result returned by ``on_after_exec()``.
+        :returns: The encoded result as a ``str``, or a generator of encoded ``str`` chunks if the result is streamed.
+        """
+        if isinstance(exec_result, collections.abc.Iterator):
+            return encode_stream(exec_result, self.stream_format)
+        return json_dumps(exec_result)
+        
+    def run(self, *args, **kwargs):
+        """
+        Runs the script and returns its result before it is encoded.
+        """
+        with profile_phase("exec"):
+            exec_result_prm = None
+            exec_result_stdin = None
+            # Run any initialisation
+            prepare_result = self.on_before_exec(*args, **kwargs)
+            # Make sure that the arguments are in the expected format
+            try:
+                self.on_validate_args(*args, **kwargs)
+            except Exception as e:
+                # The reason comes first, so that it is not lost under the help text.
+                print(e, file=sys.stderr)
+                self._script_parser.print_help()
+                sys.exit(-2)
+            # Attempt to run over command line input...    
+            exec_result_prm = self.on_exec_over_params(prepare_result)
+            # ...if that does not return anything, run over stdin.
+            # If stdin is empty, the script will appear to hang (typical). Ctrl-D to signal EOF.
+            if exec_result_prm is None:
+                exec_result_stdin = self.on_exec_over_stdin(prepare_result, *args, **kwargs)
+                return self.on_after_exec(exec_result_stdin, *args, **kwargs)
+            # Run the final stage and return the result
+            return self.on_after_exec(exec_result_prm, *args, **kwargs)
+        
     def __call__(self, *args, **kwargs):
         """
         Handles the whole script invocation logic.
+        
+        :returns: The encoded result as a ``str``, or a generator of encoded ``str`` chunks if the script streams its
+                  result. Either can be passed to ``write_result()``.
         """
-        exec_result_prm = None
-        exec_result_stdin = None
-        # Run any initialisation
-        prepare_result = self.on_before_exec(*args, **kwargs)
-        # Make sure that the arguments are in the expected format
-        try:
-            self.on_validate_args(*args, **kwargs)
-        except:
-            self._script_parser.print_help()
-            sys.exit(-2)
-        # Attempt to run over command line input...    
-        exec_result_prm = self.on_exec_over_params(prepare_result)
-        # ...if that does not return anything, run over stdin.
-        # If stdin is empty, the script will appear to hang (typical). Ctrl-D to signal EOF.
-        if not exec_result_prm:
-            exec_result_stdin = self.on_exec_over_stdin(prepare_result, *args, **kwargs)
-        # Run the final stage and return the result
-        return self.on_after_exec(exec_result_prm or exec_result_stdin, *args, **kwargs)
+        return _encode_result(self, self.run(*args, **kwargs))
+        
+        
+def apply_environment():
+    """
+    (Re)applies the ``PYJUNIX_STREAM_FORMAT``, ``PYJUNIX_JSON_CODEC`` and ``PYJUNIX_CACHE_DIR`` settings of the 
+    current environment.
+    
+    These are normally read once, when a script starts. A long running process that serves calls with different 
+    environments (see ``pyjunix.server``) calls this every time the environment changes.
+    
+    The codec is only changed if ``PYJUNIX_JSON_CODEC`` is set. Otherwise, the codec that the process already uses (the 
+    ``stdlib`` one, unless another one was selected, e.g. by ``pyjbox --codec``) is kept.
+    """
+    BasePyJUnixFunction.stream_format = os.environ.get("PYJUNIX_STREAM_FORMAT", "json")
+    if "PYJUNIX_JSON_CODEC" in os.environ:
+        set_json_codec(os.environ.get("PYJUNIX_JSON_CODEC", "stdlib"))
+    get_jsonpath_cache()
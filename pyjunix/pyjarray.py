@@ -7,8 +7,7 @@ PyJArray packs items in JSON arrays.
 """
 
 import sys
-import json
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser, iter_json_items
 
 class PyJArray(BasePyJUnixFunction):
     """
@@ -39,9 +38,9 @@ class PyJArray(BasePyJUnixFunction):
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
         if not self.script_args.cli_vars:
             return None
-        return json.dumps([an_arg for an_arg in self.script_args.cli_vars])
+        return [an_arg for an_arg in self.script_args.cli_vars]
         
     def on_exec_over_stdin(self, before_exec_result, *args, **kwargs):
-        json_data = [json.loads(u) for u in map(lambda x:x.rstrip("\n"), sys.stdin.readlines())]
-        return json.dumps(json_data)
+        # Items are packed as they are read, rather than after the whole of stdin has been consumed.
+        yield from iter_json_items(sys.stdin, mode="values")
         
@@ -7,16 +7,16 @@ Concatenates a set of JSON files containing lists of items.
 """
 
 import sys
-import json
 import argparse
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser, iter_json_items
 
 
 class PyJCat(BasePyJUnixFunction):
     """
     Concatenates the contents of 1 or more JSON files.
     
-    Notice here that these JSON files should contain lists.
+    Notice here that these JSON files should contain lists (or newline delimited JSON items). The result is streamed 
+    item by item.
     
     ::
     
@@ -40,9 +40,6 @@ class PyJCat(BasePyJUnixFunction):
         return ret_parser
         
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
-        json_data = [json.load(fd) for fd in self.script_args.files]
-        to_ret = json_data[0]
-        for jd in json_data[1:]:
-            to_ret.extend(jd)
-            
-        return json.dumps(to_ret)
+        # Items are streamed out as they are parsed, so that at most one item is held in memory.
+        for fd in self.script_args.files:
+            yield from iter_json_items(fd)
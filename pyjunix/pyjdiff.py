@@ -9,10 +9,9 @@ dict representation of the differences it has found.
 """
 
 import sys
-import json
 import argparse
 import deepdiff
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser, json_load
 
 
 class PyJDiff(BasePyJUnixFunction):
@@ -58,5 +57,5 @@ class PyJDiff(BasePyJUnixFunction):
         return ret_parser
         
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
-        return json.dumps(deepdiff.DeepDiff(json.load(self.script_args.file_1), json.load(self.script_args.file_2), 
-                          ignore_order=True))
+        return deepdiff.DeepDiff(json_load(self.script_args.file_1), json_load(self.script_args.file_2), 
+                                 ignore_order=True)
@@ -7,19 +7,148 @@ PyJGrep retrieves items from JSON data structures.
 """
 
 import os
+import re
 import sys
-import json
-import jsonpath2
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+import glob
+import functools
+import itertools
+from .core import (BasePyJUnixFunction, PyJCommandLineArgumentParser, iter_json_items, iter_json_pruned, 
+                   compile_jsonpath, compile_record_jsonpath, PyJUnixException, report_error)
 
+# A named pattern (``NAME=PATTERN``).
+_NAMED_PATTERN = re.compile(r"(\w+)=(\$.*)\Z", re.DOTALL)
 
+
+def parse_pattern_spec(spec):
+    """
+    Splits a pattern given with ``-e`` to its name (if any) and the query.
+    
+    A pattern is named by prefixing it with ``NAME=`` (e.g. ``owner=$.metadata.owner``).
+    
+    :returns: ``(name, jsonpath_pattern)``, where ``name`` is ``None`` if the pattern is not named.
+    :rtype: tuple
+    """
+    match = _NAMED_PATTERN.match(spec)
+    if match is None:
+        return None, spec
+    return match.group(1), match.group(2)
+    
+    
+def _unwrap(query_results):
+    return query_results[0] if len(query_results) == 1 else query_results
+    
+    
+def _shape_results(query_results, fields):
+    """
+    Puts together the results of the queries of a call.
+    
+    :param query_results: The (unwrapped) result of each query.
+    :type query_results: list
+    :param fields: ``None`` for a single query, otherwise the key of the result of each query in the output, or 
+                   ``None`` for each query if the output is a list.
+    :type fields: list
+    """
+    if fields is None:
+        return query_results[0]
+    if any(fields):
+        return dict(zip(fields, query_results))
+    return query_results
+    
+    
+def _has_match(query_result, fields):
+    if fields is None:
+        return query_result != []
+    return any(a_result != [] for a_result in (query_result.values() if any(fields) else query_result))
+    
+    
+def _iter_record_matches(records, jsonpath_exps, fields):
+    for a_record in records:
+        query_results = [an_exp.values(a_record) for an_exp in jsonpath_exps]
+        if any(query_results):
+            yield _shape_results(list(map(_unwrap, query_results)), fields)
+            
+            
+def _grep_records(records, jsonpath_patterns, fields, max_count=None, count=False):
+    """
+    Applies one or more queries to each one of ``records``.
+    
+    :returns: A generator of the results of matching records, or their number if ``count`` is set.
+    """
+    matches = _iter_record_matches(records, list(map(compile_record_jsonpath, jsonpath_patterns)), fields)
+    if max_count is not None:
+        matches = itertools.islice(matches, max(max_count, 0))
+    if count:
+        return sum(1 for a_match in matches)
+    return matches
+    
+    
+def _grep_document(fd, jsonpath_patterns, fields, prune=False):
+    """
+    Applies one or more queries to each document of a stream, in one pass. The result of each query is a single value 
+    or a list of values.
+    
+    If ``prune`` is set, only the parts of the documents that the queries can select are decoded.
+    """
+    jsonpath_exps = list(map(compile_jsonpath, jsonpath_patterns))
+    if prune:
+        documents = iter_json_pruned(fd, jsonpath_exps)
+    else:
+        documents = iter_json_items(fd, mode="values")
+    query_results = [[] for an_exp in jsonpath_exps]
+    for json_data in documents:
+        for a_result, an_exp in zip(query_results, jsonpath_exps):
+            a_result.extend(an_exp.values(json_data))
+    return _shape_results(list(map(_unwrap, query_results)), fields)
+    
+    
+def _grep_file(jsonpath_patterns, fields, per_record, max_count, count, use_index, prune, file_path):
+    """
+    Applies one or more queries to a file (possibly within a worker process, where the queries are compiled once).
+    
+    A single query over each record that can be answered from the index of the file (see ``pyjindex``) only decodes 
+    the records that may match.
+    """
+    if per_record and use_index and len(jsonpath_patterns) == 1:
+        from .pyjindex import load_index, find_index_spans, iter_indexed_records
+        
+        index = load_index(file_path)
+        spans = find_index_spans(index, compile_record_jsonpath(jsonpath_patterns[0])) if index is not None else None
+        if spans is not None:
+            query_result = _grep_records(iter_indexed_records(file_path, spans), jsonpath_patterns, fields, 
+                                         max_count, count)
+            return query_result if count else list(query_result)
+    with open(file_path, "rt", encoding="utf-8") as fd:
+        if per_record:
+            query_result = _grep_records(iter_json_items(fd), jsonpath_patterns, fields, max_count, count)
+            return query_result if count else list(query_result)
+        return _grep_document(fd, jsonpath_patterns, fields, prune)
+        
+        
+def _file_error(file_path, error):
+    """
+    Reports a file that could not be queried, like grep does, without stopping the rest of the files.
+    """
+    reason = error.strerror if isinstance(error, OSError) and error.strerror else error
+    report_error(f"pyjgrep: {file_path}: {reason}", exit_status=2)
+    
+    
+def expand_file_patterns(file_patterns):
+    """
+    Expands glob patterns (including ``**``) to the (sorted) paths they match, keeping paths that are not patterns.
+    """
+    file_paths = []
+    for a_pattern in file_patterns:
+        file_paths.extend(sorted(glob.glob(a_pattern, recursive=True)) or [a_pattern])
+    return file_paths
+            
+            
 class PyJGrep(BasePyJUnixFunction):
     """
     Performs grep by applying the XPath equivalent to a JSON document.
     
     ::
     
-        usage: pyjgrep [-h] jsonpath_pattern [cli_vars [cli_vars ...]]
+        usage: pyjgrep [-h] [-e [NAME=]PATTERN] [-R] [-m MAX_COUNT] [-c] [--files] [-j JOBS] [--unordered] [--no-index] [--prune] [jsonpath_pattern] [cli_vars [cli_vars ...]]
 
         Performs grep over JSON documents using jsonpath.
 
@@ -30,49 +159,210 @@ class PyJGrep(BasePyJUnixFunction):
 
         optional arguments:
           -h, --help        show this help message and exit
+          -e [NAME=]PATTERN, --pattern [NAME=]PATTERN
+                            A jsonpath query string, optionally named. May be
+                            given more than once, in place of jsonpath_pattern.
+          -R, --records     Apply the query to each item of the input as it is
+                            read.
+          -m MAX_COUNT, --max-count MAX_COUNT
+                            Stop after this many matching items (implies -R).
+          -c, --count       Only return the number of matching items (implies
+                            -R).
+          --files           Treat cli_vars as paths of (or glob patterns for)
+                            files to run the query over.
+          -j JOBS, --jobs JOBS  
+                            Number of worker processes for --files (default:
+                            number of CPUs).
+          --unordered       Return the results of --files as soon as each file
+                            is done, rather than in the order of the files.
+          --no-index        Scan files even if they have been indexed by
+                            pyjindex.
+          --prune           Only decode the parts of the input that the query
+                            can select.
 
     By definition, PyJGrep should return lists as its result is produced by iterative application of the query string 
     over its command line parameters (for example). However, if the result of a query is a single item list, the content
     of that item is returned rather than the list. This saves additional ``pyjunix`` script invocation later on, to 
     isolate those single items.
+    
+    With ``-R``, the query is applied to each item of the input (each element of a top-level array, or each value of
+    newline delimited JSON) as it is read, rather than to the whole input at once. The result of each matching item 
+    (again, a single value or a list of values) is emitted as soon as it is found and items that do not match are
+    skipped. A query over the whole list (e.g. ``$[*].pid``) is applied to each item as ``$.pid``.
+    
+    ``-m N`` stops reading the input after ``N`` matching items and ``-c`` returns the number of matching items 
+    instead of the items themselves.
+    
+    With ``--files``, the query runs over each one of the files given (or matched by glob patterns such as 
+    ``'logs/**/*.json'``), by a pool of ``-j`` worker processes. Each result is tagged with the file it comes from, as 
+    ``{"file": ..., "match": ...}`` (or ``{"file": ..., "count": ...}`` with ``-c``). With ``-R``, each matching item 
+    gives a separate result. Files without matches do not produce any result, unless counting. Results are returned in 
+    the order of the files, or as soon as each file is done with ``--unordered``. As with grep, files that can not be 
+    read or decoded (including glob patterns that match nothing) are reported on ``stderr`` and skipped, and the 
+    script exits with status 2 once the rest of the files are done.
+    
+    Files indexed by ``pyjindex`` are not scanned for queries over each record that filter records by the value of an
+    indexed key (e.g. ``pyjgrep -R --files '$[*][?(@.user = \\"x\\")]' snapshot.json``, where the quotes around the
+    value are escaped so that they are passed on to the query). Only the records with that value are read from the file
+    instead, producing the same results. ``--no-index`` scans such files anyway.
+    
+    With ``--prune``, the parts of the input that a query can not select are skipped while it is being parsed, rather
+    than decoded (see ``iter_json_pruned()``). For example, ``$.metadata.owner`` only decodes the ``owner`` of the 
+    ``metadata`` of a document and skips over everything else. This cuts down both time and memory for queries that 
+    select a small part of a large document and makes no difference to their result. Pruning applies to queries over 
+    whole documents (i.e. not with ``-R``).
+    
+    Several queries can be given with ``-e`` (in place of ``jsonpath_pattern``) and are all applied to each document 
+    (or item) while it is parsed once. The result is a list of the results of the queries, in the order they were 
+    given (e.g. ``pyjgrep -e '$.pid' -e '$.user'``), or an object if any one of them is named as ``NAME=PATTERN`` 
+    (e.g. ``pyjgrep -e 'pid=$.pid' -e 'user=$.user'`` returns ``{"pid": ..., "user": ...}``). Queries without a name
+    are then keyed by the query itself and every key must be distinct. Queries that do not match return ``[]``. With ``-R``, an item matches if any
+    one of the queries matches it and ``--prune`` decodes everything that any one of the queries can select.
     """
     
     def on_get_parser(self):
         ret_parser = PyJCommandLineArgumentParser(prog="pyjgrep", description="Performs grep over JSON documents using jsonpath.")
-        ret_parser.add_argument("jsonpath_pattern", help="The jsonpath query string. (See https://github.com/json-path/JsonPath).")
+        ret_parser.add_argument("jsonpath_pattern", nargs="?", 
+                                help="The jsonpath query string. (See https://github.com/json-path/JsonPath).")
         ret_parser.add_argument("cli_vars", nargs="*", help="Zero or more JSON objects to run the query over.")
+        ret_parser.add_argument("-e", "--pattern", dest="patterns", action="append", metavar="[NAME=]PATTERN", 
+                                help="A jsonpath query string, optionally named. May be given more than once, in "
+                                     "place of jsonpath_pattern.")
+        ret_parser.add_argument("-R", "--records", default=False, action="store_true", 
+                                help="Apply the query to each item of the input as it is read.")
+        ret_parser.add_argument("-m", "--max-count", dest="max_count", type=int, 
+                                help="Stop after this many matching items (implies -R).")
+        ret_parser.add_argument("-c", "--count", default=False, action="store_true", 
+                                help="Only return the number of matching items (implies -R).")
+        ret_parser.add_argument("--files", default=False, action="store_true", 
+                                help="Treat cli_vars as paths of (or glob patterns for) files to run the query over.")
+        ret_parser.add_argument("-j", "--jobs", type=int, 
+                                help="Number of worker processes for --files (default: number of CPUs).")
+        ret_parser.add_argument("--unordered", default=False, action="store_true", 
+                                help="Return the results of --files as soon as each file is done, rather than in the "
+                                     "order of the files.")
+        ret_parser.add_argument("--no-index", dest="use_index", default=True, action="store_false", 
+                                help="Scan files even if they have been indexed by pyjindex.")
+        ret_parser.add_argument("--prune", default=False, action="store_true", 
+                                help="Only decode the parts of the input that the query can select.")
         
         return ret_parser
         
+    def on_validate_args(self, *args, **kwargs):
+        if self.script_args.patterns:
+            # With -e, every positional argument is something to run the queries over.
+            if self.script_args.jsonpath_pattern is not None:
+                self.script_args.cli_vars.insert(0, self.script_args.jsonpath_pattern)
+            names, self._jsonpath_patterns = zip(*map(parse_pattern_spec, map(str, self.script_args.patterns)))
+            if any(names):
+                self._fields = [a_name or a_pattern for a_name, a_pattern in zip(names, self._jsonpath_patterns)]
+                if len(set(self._fields)) < len(self._fields):
+                    raise PyJUnixException(f"pyjgrep expects distinct pattern names, received "
+                                           f"{', '.join(self._fields)}")
+            else:
+                self._fields = list(names)
+        elif self.script_args.jsonpath_pattern is not None:
+            self._jsonpath_patterns = (self.script_args.jsonpath_pattern,)
+            self._fields = None
+        else:
+            raise PyJUnixException("pyjgrep expects a jsonpath pattern")
+        # Checks the queries before any input is read.
+        for a_pattern in self._jsonpath_patterns:
+            try:
+                compile_jsonpath(a_pattern)
+            except ValueError as e:
+                raise PyJUnixException(f"pyjgrep received an invalid jsonpath pattern {a_pattern} ({e})")
+        return True
+        
+    def _is_per_record(self):
+        return self.script_args.records or self.script_args.count or self.script_args.max_count is not None
+        
+    def _grep_records(self, records):
+        return _grep_records(records, self._jsonpath_patterns, self._fields, self.script_args.max_count, 
+                             self.script_args.count)
+                             
+    def _iter_file_results(self, file_paths):
+        """
+        Runs the query over files, serially or in a process pool.
+        
+        Files that can not be read or decoded are reported (see ``_file_error()``) and left out.
+        
+        :returns: A generator of ``(file_path, query_result)`` pairs.
+        """
+        per_record = self._is_per_record()
+        grep_file = functools.partial(_grep_file, self._jsonpath_patterns, self._fields, per_record, 
+                                      self.script_args.max_count, self.script_args.count, self.script_args.use_index,
+                                      self.script_args.prune)
+        jobs = min(self.script_args.jobs or os.cpu_count() or 1, len(file_paths))
+        if jobs <= 1:
+            for a_path in file_paths:
+                try:
+                    query_result = grep_file(a_path)
+                except (OSError, ValueError) as e:
+                    _file_error(a_path, e)
+                    continue
+                yield a_path, query_result
+            return
+            
+        import concurrent.futures
+        
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(grep_file, a_path) for a_path in file_paths]
+            if self.script_args.unordered:
+                path_of = dict(zip(futures, file_paths))
+                completed = ((path_of[a_future], a_future) for a_future in concurrent.futures.as_completed(futures))
+            else:
+                completed = zip(file_paths, futures)
+            try:
+                for a_path, a_future in completed:
+                    try:
+                        query_result = a_future.result()
+                    except (OSError, ValueError) as e:
+                        _file_error(a_path, e)
+                        continue
+                    yield a_path, query_result
+            finally:
+                # If the output stops early, files that have not started are skipped.
+                for a_future in futures:
+                    a_future.cancel()
+                    
+    def _grep_files(self, file_patterns):
+        """
+        Applies the query to files, tagging each result with its file.
+        """
+        per_record = self._is_per_record()
+        for a_path, query_result in self._iter_file_results(expand_file_patterns(file_patterns)):
+            if self.script_args.count:
+                yield {"file": a_path, "count": query_result}
+            elif per_record:
+                for a_match in query_result:
+                    yield {"file": a_path, "match": a_match}
+            elif _has_match(query_result, self._fields):
+                yield {"file": a_path, "match": query_result}
+        
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
         if not self.script_args.cli_vars:
             return None
+        if self.script_args.files:
+            return self._grep_files([str(a_path) for a_path in self.script_args.cli_vars])
+        if self._is_per_record():
+            return self._grep_records(self.script_args.cli_vars)
         
         result = []
-        # TODO: HIGH, This should be tested at the validate args level and raise exception if it should fail.
-        jsonpath_exp = jsonpath2.Path.parse_str(self.script_args.jsonpath_pattern)
+        jsonpath_exps = list(map(compile_jsonpath, self._jsonpath_patterns))
         
         for a_var in self.script_args.cli_vars:
-            query_results = list(map(lambda x:x.current_value, jsonpath_exp.match(a_var)))
-            if len(query_results) == 1:
-                result.append(query_results[0])
-            else:
-                result.append(query_results)
+            result.append(_shape_results([_unwrap(an_exp.values(a_var)) for an_exp in jsonpath_exps], self._fields))
                 
         if len(result) == 1:
-            return json.dumps(result[0])
+            return result[0]
         else:
-            return json.dumps(result)
+            return result
         
     def on_exec_over_stdin(self, before_exec_result, *args, **kwargs):
-        # print(self.script_args.jsonpath_pattern)
-        # TODO: HIGH, This should be tested at the validate args level and raise exception if it should fail.
-        jsonpath_exp = jsonpath2.Path.parse_str(self.script_args.jsonpath_pattern)
-        
-        json_data = json.load(sys.stdin)
-        query_result = list(map(lambda x:x.current_value, jsonpath_exp.match(json_data)))
-        if len(query_result) == 1:
-            query_result = query_result[0]
-            
-        return json.dumps(query_result)
+        if self._is_per_record():
+            return self._grep_records(iter_json_items(sys.stdin))
+        # If stdin carries more than one document (e.g. newline delimited JSON), the query is applied to each one of 
+        # them as it is parsed.
+        return _grep_document(sys.stdin, self._jsonpath_patterns, self._fields, self.script_args.prune)
         
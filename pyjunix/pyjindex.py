@@ -0,0 +1,251 @@
+"""
+Builds sidecar indexes over large JSON files, so that repeated queries can skip parsing them.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import json
+import array
+import pickle
+import hashlib
+import tempfile
+from .core import (BasePyJUnixFunction, PyJCommandLineArgumentParser, iter_json_items, compile_record_jsonpath,
+                   json_loads)
+
+# The index of FILE is stored in FILE + INDEX_SUFFIX.
+INDEX_SUFFIX = ".pyjindex"
+# Indexes of a different format are ignored (and have to be rebuilt).
+INDEX_FORMAT = 1
+
+
+def get_index_path(file_path):
+    """
+    Returns the path of the (sidecar) index of a file.
+    """
+    return file_path + INDEX_SUFFIX
+    
+    
+def _normalise_value(value):
+    # Values that compare equal in a query (e.g. 1, 1.0 and true) are stored under the same entry.
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, list):
+        return [_normalise_value(an_item) for an_item in value]
+    if isinstance(value, dict):
+        return {a_key: _normalise_value(a_value) for a_key, a_value in value.items()}
+    return value
+    
+    
+def _index_entry(value):
+    """
+    Returns the entry of the index that a key value is stored under.
+    """
+    # Independent of the JSON codec in use, as indexes outlive the process that built them.
+    return json.dumps(_normalise_value(value), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    
+    
+def _file_digest(file_path):
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as fd:
+        for a_block in iter(lambda: fd.read(1 << 20), b""):
+            file_hash.update(a_block)
+    return file_hash.hexdigest()
+    
+    
+def build_index(file_path, key_expressions):
+    """
+    Indexes the records of a file (the items of a top-level array, or the values of newline delimited JSON) by the
+    values of one or more keys and stores the index next to the file.
+    
+    :param file_path: The path of the file to index.
+    :type file_path: str
+    :param key_expressions: The JSONPath expressions of the keys (over the whole list or over each record).
+    :type key_expressions: list
+    :returns: The index.
+    :rtype: dict
+    """
+    file_stat = os.stat(file_path)
+    key_paths = {str(compile_record_jsonpath(an_expression)): compile_record_jsonpath(an_expression)
+                 for an_expression in key_expressions}
+    key_entries = {a_key: {} for a_key in key_paths}
+    # The start and end offsets of record n are at 2n and 2n + 1.
+    spans = array.array("q")
+    with open(file_path, "rt", encoding="utf-8", newline="") as fd:
+        for record_number, (a_record, start, end) in enumerate(iter_json_items(fd, with_offsets=True)):
+            spans.extend((start, end))
+            for a_key, a_key_path in key_paths.items():
+                entries = key_entries[a_key]
+                # A record is listed once under each distinct value of the key. Most values belong to a single 
+                # record, which is stored as is rather than in a list.
+                for an_entry in set(map(_index_entry, a_key_path.values(a_record))):
+                    entry_records = entries.get(an_entry)
+                    if entry_records is None:
+                        entries[an_entry] = record_number
+                    elif type(entry_records) is int:
+                        entries[an_entry] = [entry_records, record_number]
+                    else:
+                        entry_records.append(record_number)
+                        
+    index = {"format": INDEX_FORMAT,
+             "size": file_stat.st_size,
+             "mtime_ns": file_stat.st_mtime_ns,
+             "digest": _file_digest(file_path),
+             "records": len(spans) // 2,
+             "spans": spans,
+             "keys": key_entries}
+    index_path = get_index_path(file_path)
+    # Written to a temporary file first, so that concurrent readers never see a partial index.
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(index_path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as index_fd:
+            pickle.dump(index, index_fd, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, index_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return index
+    
+    
+def load_index(file_path):
+    """
+    Returns the index of a file, if it has one and it is still valid.
+    
+    An index is valid as long as the size and modification time of the file have not changed since it was built. If
+    only the modification time has changed (e.g. the file was copied or touched), the contents of the file are hashed
+    and compared to those that were indexed.
+    
+    :param file_path: The path of the indexed file.
+    :type file_path: str
+    :returns: The index, or ``None``.
+    :rtype: dict
+    """
+    try:
+        with open(get_index_path(file_path), "rb") as index_fd:
+            index = pickle.load(index_fd)
+        file_stat = os.stat(file_path)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if not isinstance(index, dict) or index.get("format") != INDEX_FORMAT or index["size"] != file_stat.st_size:
+        return None
+    if index["mtime_ns"] != file_stat.st_mtime_ns and index["digest"] != _file_digest(file_path):
+        return None
+    return index
+    
+    
+def _iter_equalities(expression):
+    """
+    Returns the ``(path, value)`` pairs of the equality comparisons that all records matched by a filter expression
+    must satisfy.
+    """
+    from jsonpath2.node import Node
+    from jsonpath2.nodes.current import CurrentNode
+    from jsonpath2.expressions.operator import EqualBinaryOperatorExpression, AndVariadicOperatorExpression
+    
+    if type(expression) is AndVariadicOperatorExpression:
+        for an_expression in expression.expressions:
+            yield from _iter_equalities(an_expression)
+    elif type(expression) is EqualBinaryOperatorExpression:
+        left, right = expression.left_node_or_value, expression.right_node_or_value
+        if type(right) is CurrentNode and not isinstance(left, Node):
+            left, right = right, left
+        if type(left) is CurrentNode and not isinstance(right, Node):
+            yield "$" + left.tojsonpath()[1:], right
+            
+            
+def find_index_spans(index, record_path):
+    """
+    Looks up the records that a query may match in an index.
+    
+    The index can be used for queries that start with a filter over each record, that compares an indexed key to a
+    value (e.g. ``$[?(@.user = "x")]`` or ``$[?(@.user = "x" and @.pid > 1)].pid``). All other queries have to scan
+    the file.
+    
+    :param index: The index of the file (see ``load_index()``).
+    :type index: dict
+    :param record_path: The query, as applied to each record (see ``compile_record_jsonpath()``).
+    :type record_path: CompiledJSONPath
+    :returns: The ``(start, end)`` byte offsets of the records that may match, in file order, or ``None`` if the
+              query cannot use the index.
+    :rtype: list
+    """
+    from jsonpath2.nodes.subscript import SubscriptNode
+    from jsonpath2.subscripts.filter import FilterSubscript
+    
+    first_node = record_path.path.root_node.next_node
+    if type(first_node) is not SubscriptNode or len(first_node.subscripts) != 1 or \
+       type(first_node.subscripts[0]) is not FilterSubscript:
+        return None
+    for a_key, a_value in _iter_equalities(first_node.subscripts[0].expression):
+        if a_key in index["keys"]:
+            spans = index["spans"]
+            entry_records = index["keys"][a_key].get(_index_entry(a_value), ())
+            if type(entry_records) is int:
+                entry_records = (entry_records,)
+            # Records are listed in file order.
+            return [(spans[2 * k], spans[2 * k + 1]) for k in entry_records]
+    return None
+    
+    
+def iter_indexed_records(file_path, spans):
+    """
+    Reads and decodes the records at the given byte offsets of a file.
+    """
+    with open(file_path, "rb") as fd:
+        for start, end in spans:
+            fd.seek(start)
+            yield json_loads(fd.read(end - start).decode("utf-8"))
+            
+            
+class PyJIndex(BasePyJUnixFunction):
+    """
+    Indexes the records of JSON files by the values of one or more keys, for ``pyjgrep``.
+    
+    ::
+    
+        usage: pyjindex [-h] -k KEY files [files ...]
+        
+        Builds sidecar indexes over JSON files.
+        
+        positional arguments:
+          files              Files to index.
+          
+        optional arguments:
+          -h, --help         show this help message and exit
+          -k KEY, --key KEY  JSONPath to a key to index records by. May be
+                             given more than once.
+                             
+    The records of a file are the items of its top-level array, or its values if it is newline delimited JSON. Keys
+    are given as in ``pyjsort`` (e.g. ``$[*].user`` or ``$.user``). The index of ``FILE`` is stored in
+    ``FILE.pyjindex`` and maps each value of each key to the byte offsets of the records that have it. It is
+    rebuilt by running ``pyjindex`` again.
+    
+    ``pyjgrep --files`` then uses the index of a file for queries over each record (``-R``, ``-m``, ``-c``) that filter
+    records by the value of an indexed key (e.g. ``pyjgrep -R --files '$[*][?(@.user = \\"x\\")]' snapshot.json``),
+    reading and decoding only the records that have that value. The index is ignored (and the whole file is scanned)
+    once the file changes.
+    
+    Returns a summary of each index that was built.
+    """
+    
+    def on_get_parser(self):
+        ret_parser = PyJCommandLineArgumentParser(prog="pyjindex", description="Builds sidecar indexes over JSON files.")
+        ret_parser.add_argument("files", nargs="+", help="Files to index.")
+        ret_parser.add_argument("-k", "--key", action="append", required=True,
+                                help="JSONPath to a key to index records by. May be given more than once.")
+        return ret_parser
+        
+    def on_exec_over_params(self, before_exec_result, *args, **kwargs):
+        result = []
+        for a_path in map(str, self.script_args.files):
+            index = build_index(a_path, self.script_args.key)
+            result.append({"file": a_path,
+                           "index": get_index_path(a_path),
+                           "records": index["records"],
+                           "keys": {a_key: len(entries) for a_key, entries in index["keys"].items()}})
+        return result
+        
\ No newline at end of file
@@ -7,11 +7,49 @@ PyJJoin joins two JSON files containing lists of lists data on a common attribut
 """
 
 import sys
-import json
 import argparse
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser, PyJUnixException, iter_json_items
+from .pyjsort import make_sort_key
 
 
+def _join_items(item_1, item_2, key_2):
+    """
+    Joins two items, leaving out the key of the second one.
+    """
+    return item_1 + list(map(lambda x:x[1], filter(lambda x:not x[0]==key_2, enumerate(item_2))))
+    
+    
+# Both joins compare keys as pyjsort does, so that they pair the same items. Keys of different types (e.g. true and 1) 
+# never match, while numbers match by value (e.g. 1 and 1.0).
+_join_key = make_sort_key([])
+
+
+def _iter_key_groups(items, key, file_name):
+    """
+    Groups consecutive items of a sorted file that have the same key.
+    
+    Keys are ordered as ``pyjsort`` orders values.
+    
+    :returns: A generator of ``(join_key, items)`` pairs, in ascending order of key.
+    :raises PyJUnixException: If the items are not sorted on their key.
+    """
+    group_key = None
+    group_items = []
+    for item_number, an_item in enumerate(items):
+        item_key = _join_key(an_item[key])
+        if group_items and item_key == group_key:
+            group_items.append(an_item)
+            continue
+        if group_items:
+            if item_key < group_key:
+                raise PyJUnixException(f"pyjjoin: {file_name} is not sorted on its key at item {item_number}")
+            yield group_key, group_items
+        group_key = item_key
+        group_items = [an_item]
+    if group_items:
+        yield group_key, group_items
+        
+        
 class PyJJoin(BasePyJUnixFunction):
     """
     Joins two JSON files on a common attribute.
@@ -20,7 +58,7 @@ class PyJJoin(BasePyJUnixFunction):
     
     ::
     
-        usage: pyjjoin [-h] [-a {1,2}] [-v {1,2}] [-1 FILE_1_KEY] [-2 FILE_2_KEY]
+        usage: pyjjoin [-h] [-a {1,2}] [-v {1,2}] [-1 FILE_1_KEY] [-2 FILE_2_KEY] [--sorted]
                        f1 f2
 
         Joins two JSON documents on specific fields.
@@ -37,7 +75,16 @@ class PyJJoin(BasePyJUnixFunction):
                          as a key for the first file
           -2 FILE_2_KEY  jsonpath READ expression that determines the attribute to use
                          as a key for the second file
+          --sorted       Both files are sorted on their keys, join them as they
+                         are read
 
+    By default, both files are indexed by their keys in memory. If both files are already sorted on their keys (as
+    ``pyjsort`` sorts them, e.g. ``pyjsort -k '$[*][0]'``), ``--sorted`` joins them as they are read, holding only the 
+    items with the current key of each file in memory. Joined items (and unpaired items, with ``-a``) are then returned
+    in order of key and a file that turns out not to be sorted raises an error.
+    
+    Either way, keys are compared as ``pyjsort`` compares them. Keys of different types never match (e.g. ``true`` does 
+    not match ``1``), numbers match by value (``1`` matches ``1.0``) and arrays or objects match if they are equal.
     """
     
     def on_get_parser(self):
@@ -53,6 +100,8 @@ class PyJJoin(BasePyJUnixFunction):
         ret_parser.add_argument("-2", dest="file_2_key", type=int, default=0, 
                                 help="jsonpath READ expression that determines the attribute to use as a key for the "
                                 "second file")
+        ret_parser.add_argument("--sorted", action="store_true", 
+                                help="Both files are sorted on their keys, join them as they are read")
         ret_parser.add_argument("f1", type=argparse.FileType(mode="rt", encoding="utf-8"), 
                                 help="File name of the first file to join.")
         ret_parser.add_argument("f2", type=argparse.FileType(mode="rt", encoding="utf-8"), 
@@ -66,21 +115,48 @@ class PyJJoin(BasePyJUnixFunction):
             sys.exit(-2)
         return True
         
+    def _merge_join(self, file_data_1, file_data_2):
+        """
+        Joins two files that are sorted on their keys, group by group.
+        """
+        key_1 = self.script_args.file_1_key
+        key_2 = self.script_args.file_2_key
+        join = self.script_args.suppress_joined_items <= 0
+        # -v {1,2} suppresses the joined items and returns the unpaired items of that file, as -a {1,2} would.
+        unpaired_from = self.script_args.include_unpaired_items_from if join else self.script_args.suppress_joined_items
+        groups_1 = _iter_key_groups(file_data_1, key_1, self.script_args.f1.name)
+        groups_2 = _iter_key_groups(file_data_2, key_2, self.script_args.f2.name)
+        group_1 = next(groups_1, None)
+        group_2 = next(groups_2, None)
+        while group_1 is not None or group_2 is not None:
+            if group_2 is None or (group_1 is not None and group_1[0] < group_2[0]):
+                # Keys that are only found in the first file
+                if unpaired_from == 1:
+                    yield from group_1[1]
+                group_1 = next(groups_1, None)
+            elif group_1 is None or group_2[0] < group_1[0]:
+                # Keys that are only found in the second file
+                if unpaired_from == 2:
+                    yield from group_2[1]
+                group_2 = next(groups_2, None)
+            else:
+                if join:
+                    for an_item in group_1[1]:
+                        for another_item in group_2[1]:
+                            yield _join_items(an_item, another_item, key_2)
+                group_1 = next(groups_1, None)
+                group_2 = next(groups_2, None)
+                
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
         
         # TODO: MED, It would be great if the index was specified by jsonpath but this would complicate the output
         # file_1_key = jsonpath2.Path.parse_str(self.script_args.file_1_key)
         # file_2_key = jsonpath2.Path.parse_str(self.script_args.file_2_key)
-        file_data_1 = json.load(self.script_args.f1)
-        file_data_2 = json.load(self.script_args.f2)
-        
-        if type(file_data_1) is not list:
-            raise TypeError(f"PyJJoin expected {self.script_args.f1.name} content to be a list, received "
-                            f"{type(file_data_1)}")
-             
-        if type(file_data_2) is not list:
-            raise TypeError(f"PyJJoin expected {self.script_args.f2.name} content to be a list, received "
-                            f"{type(file_data_2)}")
+        # The files are indexed as they are being parsed, the complete lists are never held in memory.
+        file_data_1 = iter_json_items(self.script_args.f1, mode="list")
+        file_data_2 = iter_json_items(self.script_args.f2, mode="list")
+        if self.script_args.sorted:
+            return self._merge_join(file_data_1, file_data_2)
             
         # TODO: MED, This should also work across lists of lists or lists of dict
         # Index the entries of both files according to the indicated field
@@ -88,15 +164,15 @@ class PyJJoin(BasePyJUnixFunction):
         file_idx_2 = {}
         for an_item in file_data_1:
             try:
-                file_idx_1[an_item[self.script_args.file_1_key]].append(an_item)
+                file_idx_1[_join_key(an_item[self.script_args.file_1_key])].append(an_item)
             except KeyError:
-                file_idx_1[an_item[self.script_args.file_1_key]] = [an_item]
+                file_idx_1[_join_key(an_item[self.script_args.file_1_key])] = [an_item]
                 
         for an_item in file_data_2:
             try:
-                file_idx_2[an_item[self.script_args.file_2_key]].append(an_item)
+                file_idx_2[_join_key(an_item[self.script_args.file_2_key])].append(an_item)
             except KeyError:
-                file_idx_2[an_item[self.script_args.file_2_key]] = [an_item]
+                file_idx_2[_join_key(an_item[self.script_args.file_2_key])] = [an_item]
                 
         result = []
         
@@ -109,7 +185,7 @@ class PyJJoin(BasePyJUnixFunction):
                 for an_item in file_idx_1[a_key]:
                     try:
                         for another_item in file_idx_2[a_key]:
-                            result.append(an_item + list(map(lambda x:x[1], filter(lambda x:not x[0]==self.script_args.file_2_key,enumerate(another_item)))))
+                            result.append(_join_items(an_item, another_item, self.script_args.file_2_key))
                     except KeyError:
                         # This key error indicates keys that were find in the first file but not in the second
                         pass
@@ -129,4 +205,4 @@ class PyJJoin(BasePyJUnixFunction):
             for a_key in additional_item_indices:
                 result.extend(source_idx[a_key])
 
-        return json.dumps(result)
+        return result
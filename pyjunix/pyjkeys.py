@@ -7,8 +7,7 @@ PyJKeys returns the keys of a JSON object.
 """
 
 import sys
-import json
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser, json_load
             
 class PyJKeys(BasePyJUnixFunction):
     """
@@ -51,12 +50,12 @@ class PyJKeys(BasePyJUnixFunction):
         result = []
         for an_item in self.script_args.cli_vars:
             result.append(list(an_item.keys()))
-        return json.dumps(result)
+        return result
         
     def on_exec_over_stdin(self, before_exec_result, *args, **kwargs):
         # Validate stdin here
-        stdin_data = json.load(sys.stdin)
+        stdin_data = json_load(sys.stdin)
         if not type(stdin_data) is dict:
             raise TypeError(f"pyjkeys expects map, received {type(stdin_data)} through stdin.")
-        return json.dumps(stdin_data.keys())
+        return list(stdin_data.keys())
         
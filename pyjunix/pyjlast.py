@@ -6,7 +6,6 @@ PyJLast returns information about the last logged in user(s) to the system.
 
 """
 import sys
-import json
 import utmp
 import datetime
 from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
@@ -87,4 +86,4 @@ class PyJLast(BasePyJUnixFunction):
             an_item.update({"type":type_lookup[an_item["type"]],
                             "sec_date":datetime.datetime.fromtimestamp(an_item["sec"]).isoformat()})
                             
-        return json.dumps(result)
+        return result
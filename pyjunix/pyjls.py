@@ -11,7 +11,6 @@ import sys
 import stat
 import pwd
 import datetime
-import json
 from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
 
 class PyJLs(BasePyJUnixFunction):
@@ -156,5 +155,5 @@ class PyJLs(BasePyJUnixFunction):
         return ret_parser
         
     def on_exec_over_params(self, *args, **kwargs):
-        return json.dumps(self._stat_path(self.script_args.path_spec, self.script_args.maxdepth))
+        return self._stat_path(self.script_args.path_spec, self.script_args.maxdepth)
         
@@ -8,9 +8,8 @@ PyJPaste concatenates two or more JSON files containing lists of lists or lists
 """
 
 import sys
-import json
 import argparse
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser, json_load
 
 
 class PyJPaste(BasePyJUnixFunction):
@@ -67,7 +66,7 @@ class PyJPaste(BasePyJUnixFunction):
         return merged_row
         
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
-        json_file_data = [json.load(fd) for fd in self.script_args.files]
+        json_file_data = [json_load(fd) for fd in self.script_args.files]
         len_json_file_data = len(json_file_data)
         done = False
         k = 0
@@ -86,4 +85,4 @@ class PyJPaste(BasePyJUnixFunction):
                 to_ret.append(self._perform_merge(row_data))
                 k+=1
         
-        return json.dumps(to_ret)
+        return to_ret
@@ -7,8 +7,8 @@ PyJPrtPrn applies Pretty Print over JSON in compact form.
 """
 
 import sys
-import json
-from .core import BasePyJUnixFunction, PyJUnixException, PyJCommandLineArgumentParser
+from .core import (BasePyJUnixFunction, PyJUnixException, PyJCommandLineArgumentParser, json_dumps, 
+                   json_load)
 
 class PyJPrtPrn(BasePyJUnixFunction):
     """
@@ -40,11 +40,13 @@ class PyJPrtPrn(BasePyJUnixFunction):
         return ret_parser
         
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
+        if not self.script_args.cli_vars:
+            return None
         return self.script_args.cli_vars
         
     def on_exec_over_stdin(self, before_exec_result, *args, **kwargs):
-        stdin_data = json.load(sys.stdin)
+        stdin_data = json_load(sys.stdin)
         return stdin_data
         
-    def on_after_exec(self, exec_result, *args, **kwargs):
-        return json.dumps(exec_result, indent=4, sort_keys=True)
+    def on_encode_result(self, exec_result):
+        return json_dumps(exec_result, indent=4, sort_keys=True)
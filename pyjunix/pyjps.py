@@ -8,12 +8,36 @@ PyJPs dumps information about running processes.
 
 import os
 import sys
-import json
 import pwd
 import datetime
 import psutil
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser         
+from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser, json_load
 
+
+def _current_terminal():
+    """
+    Returns the terminal that the current process is attached to (as ``psutil`` names it), or ``None`` if none of its 
+    standard streams is a terminal (e.g. when both its input and output are redirected).
+    """
+    for a_stream in (sys.stderr, sys.stdin, sys.stdout):
+        try:
+            return os.ttyname(a_stream.fileno())
+        except (OSError, ValueError):
+            pass
+    return None
+    
+    
+def _iter_processes():
+    """
+    Returns the attributes of every running process, skipping processes that exit while they are being listed.
+    """
+    for a_process in psutil.process_iter():
+        try:
+            yield a_process.as_dict()
+        except psutil.NoSuchProcess:
+            pass
+            
+            
 class PyJPs(BasePyJUnixFunction):
     """
     Returns a simple process list.
@@ -119,11 +143,11 @@ class PyJPs(BasePyJUnixFunction):
         return ret_parser
         
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
-        current_username = pwd.getpwuid(os.getuid()).pw_name 
-        current_terminal = os.ttyname(sys.stderr.fileno())
-        current_processes = [u.as_dict() for u in psutil.process_iter()]
-        # Filter processes for the current user and terminal
+        current_processes = list(_iter_processes())
+        # Filter processes for the current user and terminal (without a terminal, those that are not attached to one)
         if not self.script_args.show_all:
+            current_username = pwd.getpwuid(os.getuid()).pw_name 
+            current_terminal = _current_terminal()
             filtered_processes = list(filter(lambda x:x["username"] == current_username and 
                                                       x["terminal"] == current_terminal, current_processes))
             result = list(map(lambda x:{"pid":x["pid"], 
@@ -137,7 +161,7 @@ class PyJPs(BasePyJUnixFunction):
                 an_item.update({"create_time": datetime.datetime.fromtimestamp(an_item["create_time"]).isoformat()})
                 result.append(an_item)
         
-        return json.dumps(result)
+        return result
 
 
 class PyJJoin(BasePyJUnixFunction):
@@ -190,8 +214,8 @@ class PyJJoin(BasePyJUnixFunction):
         # TODO: MED, It would be great if the index was specified by jsonpath but this would complicate the output
         # file_1_key = jsonpath2.Path.parse_str(self.script_args.file_1_key)
         # file_2_key = jsonpath2.Path.parse_str(self.script_args.file_2_key)
-        file_data_1 = json.load(self.script_args.f1)
-        file_data_2 = json.load(self.script_args.f2)
+        file_data_1 = json_load(self.script_args.f1)
+        file_data_2 = json_load(self.script_args.f2)
         
         if type(file_data_1) is not list:
             raise TypeError(f"PyJJoin expected {self.script_args.f1.name} content to be a list, received "
@@ -248,4 +272,4 @@ class PyJJoin(BasePyJUnixFunction):
             for a_key in additional_item_indices:
                 result.extend(source_idx[a_key])
 
-        return json.dumps(result)
+        return result
@@ -5,67 +5,572 @@ PyJSort, sorts items in arrays according to a jsonpath key.
 :date: September 2019
 
 """
+import os
+import re
 import sys
-import json
-import jsonpath2
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+import heapq
+import pickle
+import shutil
+import datetime
+import operator
+import tempfile
+import functools
+import itertools
+import collections
+from .core import (BasePyJUnixFunction, PyJCommandLineArgumentParser, PyJUnixException, iter_json_items, 
+                   compile_record_jsonpath, json_dumps)
 
+# Sorted runs are written to (and read back from) disk in batches of this many items.
+RUN_BATCH_SIZE = 1024
+# Maximum number of runs that are merged at once (each one keeps a file open).
+MAX_MERGE_RUNS = 64
+# The (estimated) memory use of every n-th item stands for the items that follow it.
+SIZE_SAMPLE_INTERVAL = 16
+# Items are handed to worker processes (--parallel) in chunks of this many items.
+PARALLEL_CHUNK_SIZE = 8192
+
+_BUFFER_SIZE_UNITS = {"B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+_NATURAL_SPLIT = re.compile(r"(\d+)")
+_KEY_SPEC_SUFFIX = re.compile(r"[A-Za-z]+\Z")
+
+
+def parse_buffer_size(size_spec):
+    """
+    Translates a buffer size to bytes, as ``sort -S`` does (e.g. ``500M``). A plain number is in kilobytes.
+    
+    :raises PyJUnixException: If ``size_spec`` is not a valid size.
+    """
+    size_spec = str(size_spec).strip().upper()
+    unit = "K"
+    if size_spec[-1:] in _BUFFER_SIZE_UNITS:
+        size_spec, unit = size_spec[:-1], size_spec[-1]
+    try:
+        size = int(float(size_spec) * _BUFFER_SIZE_UNITS[unit])
+    except ValueError:
+        raise PyJUnixException(f"Invalid buffer size {size_spec}{unit}")
+    if size <= 0:
+        raise PyJUnixException(f"Invalid buffer size {size_spec}{unit}")
+    return size
+    
+    
+def _estimate_size(obj):
+    """
+    Returns a rough estimate of the memory held by a decoded JSON value.
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for a_key, a_value in obj.items():
+            size += sys.getsizeof(a_key) + _estimate_size(a_value)
+    elif isinstance(obj, list):
+        for a_value in obj:
+            size += _estimate_size(a_value)
+    return size
+    
+    
+def _json_sort_key(value):
+    """
+    Maps a decoded JSON value to a key that orders values of all types.
+    
+    Values are ordered by type first (``null``, booleans, numbers, strings, arrays, objects) and by value within each
+    type. Arrays are ordered element by element and objects by their (sorted) key/value pairs.
+    """
+    if value is None:
+        return (0,)
+    if value is True or value is False:
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    if isinstance(value, list):
+        return (4, tuple(map(_json_sort_key, value)))
+    if isinstance(value, dict):
+        return (5, tuple(sorted((a_key, _json_sort_key(a_value)) for a_key, a_value in value.items())))
+    return (6, repr(value))
+    
+    
+def _decode_numeric(value):
+    if value is True or value is False:
+        raise TypeError("Not a number")
+    return float(value)
+    
+    
+def _decode_date(value):
+    if not isinstance(value, str):
+        raise TypeError("Not a date")
+    if value[-1:] in ("Z", "z"):
+        value = value[:-1] + "+00:00"
+    a_date = datetime.datetime.fromisoformat(value)
+    # Dates with a timezone are compared in UTC, dates without one are assumed to be in UTC.
+    if a_date.tzinfo is not None:
+        a_date = a_date.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return a_date
+    
+    
+def _decode_version(value):
+    if value is True or value is False or not isinstance(value, (str, int, float)):
+        raise TypeError("Not a version")
+    # Digits end up at the odd positions, so that numbers are only ever compared to numbers.
+    return tuple(int(a_part) if k % 2 else a_part for k, a_part in enumerate(_NATURAL_SPLIT.split(str(value))))
+    
+    
+def _decode_string(value):
+    if not isinstance(value, str):
+        raise TypeError("Not a string")
+    return value
+    
+    
+# Decoders of the types a key can be compared as (see ``PyJSort``).
+KEY_TYPES = {"numeric": _decode_numeric, 
+             "date": _decode_date, 
+             "version": _decode_version, 
+             "string": _decode_string}
+             
+KEY_TYPE_ALIASES = {"n": "numeric", "d": "date", "v": "version", "natural": "version", "s": "string"}
+
+
+@functools.total_ordering
+class _Reversed:
+    """
+    Wraps a key so that it sorts in the opposite direction.
+    """
+    
+    __slots__ = ("value",)
+    
+    def __init__(self, value):
+        self.value = value
+        
+    def __eq__(self, other):
+        return self.value == other.value
+        
+    def __lt__(self, other):
+        return other.value < self.value
+        
+    def __reduce__(self):
+        return (_Reversed, (self.value,))
+        
+        
+def parse_key_spec(key_spec):
+    """
+    Splits a key specification of the form ``PATH[:type][:r]`` to its parts.
+    
+    :returns: The JSONPath of the key, the name of its type (or ``None``) and whether it sorts in reverse.
+    :rtype: tuple
+    :raises PyJUnixException: If the type is not one of ``KEY_TYPES``.
+    """
+    key_type = None
+    reverse = False
+    key_path = str(key_spec)
+    while ":" in key_path:
+        key_path_prefix, key_suffix = key_path.rsplit(":", 1)
+        if not _KEY_SPEC_SUFFIX.match(key_suffix):
+            # e.g. a slice
+            break
+        key_suffix = key_suffix.lower()
+        if key_suffix == "r" and not reverse:
+            reverse = True
+        elif KEY_TYPE_ALIASES.get(key_suffix, key_suffix) in KEY_TYPES and key_type is None:
+            key_type = KEY_TYPE_ALIASES.get(key_suffix, key_suffix)
+        else:
+            raise PyJUnixException(f"Unknown key type {key_suffix} in {key_spec}, expected one of "
+                                   f"{', '.join(KEY_TYPES)}")
+        key_path = key_path_prefix
+    return key_path, key_type, reverse
+    
+    
+def _make_key_part(key_spec):
+    """
+    Returns a function that extracts the part of the sort key of an item that corresponds to a key specification.
+    """
+    key_expression, key_type, reverse = parse_key_spec(key_spec)
+    key_path = compile_record_jsonpath(key_expression)
+    decode = KEY_TYPES[key_type] if key_type else None
+    
+    def get_key_part(an_item):
+        key_values = key_path.values(an_item)
+        if len(key_values) == 1:
+            key_value = key_values[0]
+        else:
+            key_value = key_values or None
+        if decode is None:
+            key_part = _json_sort_key(key_value)
+        elif key_value is None:
+            key_part = (0,)
+        else:
+            # Values that are not of the key's type go after null and before all values that are.
+            try:
+                key_part = (2, decode(key_value))
+            except (TypeError, ValueError):
+                key_part = (1, _json_sort_key(key_value))
+        return _Reversed(key_part) if reverse else key_part
+    return get_key_part
+    
+    
+def make_sort_key(key_specs):
+    """
+    Returns a function that computes the sort key of an item, given a list of key specifications (see ``PyJSort``).
+    
+    Keys are computed once per item, as tuples with one element per key specification. Without any key 
+    specifications, items are sorted by themselves.
+    """
+    if not key_specs:
+        return _json_sort_key
+    key_parts = [_make_key_part(a_key_spec) for a_key_spec in key_specs]
+    if len(key_parts) == 1:
+        return key_parts[0]
+    return lambda an_item: tuple(get_key_part(an_item) for get_key_part in key_parts)
+    
+    
+@functools.lru_cache(maxsize=16)
+def _get_sort_key(key_specs):
+    return make_sort_key(list(key_specs))
+    
+    
+def _compute_chunk_keys(key_specs, items):
+    """
+    Computes the sort keys of a chunk of items (within a worker process).
+    """
+    return list(map(_get_sort_key(key_specs), items))
+    
+    
+def _sort_chunk(key_specs, reverse, items):
+    """
+    Sorts a chunk of items (within a worker process).
+    
+    :returns: The ``(key, index)`` pairs of the items in sorted order.
+    :rtype: list
+    """
+    keys = _compute_chunk_keys(key_specs, items)
+    return [(keys[k], k) for k in sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)]
+    
+    
+def _iter_chunks(items, chunk_size):
+    items = iter(items)
+    a_chunk = list(itertools.islice(items, chunk_size))
+    while a_chunk:
+        yield a_chunk
+        a_chunk = list(itertools.islice(items, chunk_size))
+        
+        
+def _map_chunks(executor, function, chunks, max_pending):
+    """
+    Applies a function to chunks in an executor, with at most ``max_pending`` chunks in flight.
+    
+    :returns: A generator of ``(chunk, result)`` pairs, in the order of ``chunks``.
+    """
+    pending = collections.deque()
+    for a_chunk in chunks:
+        pending.append((a_chunk, executor.submit(function, a_chunk)))
+        if len(pending) >= max_pending:
+            a_chunk, a_future = pending.popleft()
+            yield a_chunk, a_future.result()
+    while pending:
+        a_chunk, a_future = pending.popleft()
+        yield a_chunk, a_future.result()
+        
+        
+def _merge_streams(streams, get_key, reverse):
+    """
+    Merges sorted JSON streams, closing them when done.
+    """
+    try:
+        yield from heapq.merge(*map(iter_json_items, streams), key=get_key, reverse=reverse)
+    finally:
+        for a_stream in streams:
+            if a_stream is not sys.stdin:
+                a_stream.close()
+                
+                
+def _write_run(pairs, temp_dir):
+    """
+    Writes an iterable of (already sorted) ``(key, item)`` pairs to a new file in ``temp_dir`` and returns its path.
+    """
+    fd, run_path = tempfile.mkstemp(dir=temp_dir, suffix=".run")
+    with os.fdopen(fd, "wb") as run_fd:
+        batch = []
+        for a_pair in pairs:
+            batch.append(a_pair)
+            if len(batch) == RUN_BATCH_SIZE:
+                pickle.dump(batch, run_fd, protocol=pickle.HIGHEST_PROTOCOL)
+                batch = []
+        if batch:
+            pickle.dump(batch, run_fd, protocol=pickle.HIGHEST_PROTOCOL)
+    return run_path
+    
+    
+def _read_run(run_path):
+    """
+    Reads back the ``(key, item)`` pairs of a run written by ``_write_run()``.
+    """
+    with open(run_path, "rb", buffering=65536) as run_fd:
+        while True:
+            try:
+                batch = pickle.load(run_fd)
+            except EOFError:
+                return
+            yield from batch
+            
+            
+def _merge_runs(run_paths, temp_dir, reverse):
+    """
+    Merges sorted runs into a single sorted stream of items, removing ``temp_dir`` once done.
+    
+    Ties are resolved in favour of earlier runs, so merging runs of consecutive parts of the input is stable.
+    """
+    pair_key = operator.itemgetter(0)
+    try:
+        # Too many runs to keep open at once are merged in stages, keeping consecutive runs together.
+        while len(run_paths) > MAX_MERGE_RUNS:
+            merged_run_paths = []
+            for k in range(0, len(run_paths), MAX_MERGE_RUNS):
+                run_group = run_paths[k:k + MAX_MERGE_RUNS]
+                if len(run_group) == 1:
+                    merged_run_paths.extend(run_group)
+                    continue
+                merged_run_paths.append(_write_run(heapq.merge(*map(_read_run, run_group), key=pair_key, 
+                                                               reverse=reverse), temp_dir))
+                for a_run_path in run_group:
+                    os.remove(a_run_path)
+            run_paths = merged_run_paths
+            
+        for a_pair in heapq.merge(*map(_read_run, run_paths), key=pair_key, reverse=reverse):
+            yield a_pair[1]
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        
+        
 class PyJSort(BasePyJUnixFunction):
     """
     Sorts items in its input. It naturally operates over lists of items.
     
     When called over command line arguments, it treats them as a list.
-    When called over stdin, a valid JSON list must be passed as an argument.
+    When called over stdin, a valid JSON list (or a stream of newline delimited JSON items) must be passed as an 
+    argument.
     
     ::
     
-        usage: pyjsort [-h] [-k KEY] [-r] [cli_vars [cli_vars ...]]
+        usage: pyjsort [-h] [-k KEY] [-r] [-n HEAD] [-m | -c] [-S BUFFER_SIZE] [-T TEMPORARY_DIRECTORY] [--parallel PARALLEL] [cli_vars [cli_vars ...]]
 
         Sorts items in its input.
 
         positional arguments:
           cli_vars           Zero or more JSON objects to sort. These are treated
-                             implicitly as a list.
+                             implicitly as a list. With -m, the files to merge.
 
         optional arguments:
           -h, --help         show this help message and exit
-          -k KEY, --key KEY  JSONPath to the key to be used for sorting items.
+          -k KEY, --key KEY  JSONPath to the key to be used for sorting items,
+                             optionally followed by :type and :r (reverse).
+                             May be given more than once.
           -r, --reverse      Sort in reverse order.
+          -n HEAD, --head HEAD
+                             Only return the first HEAD items of the sorted 
+                             output.
+          -m, --merge        Merge already sorted files (- for stdin).
+          -c, --check        Check whether the input is sorted.
+          -S BUFFER_SIZE, --buffer-size BUFFER_SIZE
+                             Use at most this much memory for items, spilling 
+                             sorted runs to disk beyond it (e.g. 500M).
+          -T TEMPORARY_DIRECTORY, --temporary-directory TEMPORARY_DIRECTORY
+                             Directory for the sorted runs.
+          --parallel PARALLEL
+                             Number of worker processes that compute keys and
+                             sort (0 for one per CPU).
+                             
+    The key is extracted from each item. It can be given either over the whole list (e.g. ``$[*].pid``) or over each 
+    item (e.g. ``$.pid``). Items without the key have a key of ``null`` and items with more than one value under the key
+    have a list of these values as their key.
+    
+    Keys are given as ``PATH[:type][:r]`` and ``-k`` can be repeated to sort by more than one key (e.g. 
+    ``-k '$.user' -k '$.cpu_percent:n:r'``). Keys are compared as JSON values (``null`` < booleans < numbers < strings 
+    < arrays < objects), unless a type is given:
+    
+    * ``numeric`` (``n``): Numbers and strings that are numbers.
+    * ``date`` (``d``): ISO 8601 dates (e.g. ``sec_date`` of ``pyjlast``).
+    * ``version`` (``v``, ``natural``): Strings with embedded numbers, compared numerically (e.g. ``1.9`` < ``1.10``).
+    * ``string`` (``s``): Strings.
+    
+    Items without the key sort first, followed by items whose key is not of the given type and then all other items. 
+    ``:r`` reverses the order of a single key, ``-r`` reverses the order of the whole output.
+    
+    By default, all items are held in memory. If ``-S`` is given and the input needs more memory than that, sorted 
+    runs of the input are written to temporary files (in ``-T`` or the system's temporary directory) and merged to 
+    produce the output. Either way, the result is the same (stable) sort.
+    
+    With ``-n K``, only the first ``K`` items of the sorted output are kept while the input is read, in ``O(n log K)`` 
+    time and ``O(K)`` memory.
+    
+    With ``-m``, the positional arguments are the paths of JSON array or newline delimited JSON files (``-`` for 
+    ``stdin``) that are already sorted (by the same keys) and are merged as they are read, in ``O(n log k)`` time for
+    ``k`` files, with constant memory per file.
     
+    With ``-c``, the input is checked, item by item, without producing any output. At the first item that is out of 
+    order, a message is written to ``stderr`` and the script exits with status 1.
+    
+    With ``--parallel N``, the input is split in chunks whose keys are computed (and, for a full sort in memory, 
+    sorted) by ``N`` worker processes. The sorted chunks are then merged in their input order, so the result is 
+    exactly that of the (stable) serial sort. This pays off when keys are expensive to compute (e.g. ``date`` keys or 
+    complex JSONPath expressions), as items have to be sent to the workers.
     """
     
     def on_get_parser(self):
         ret_parser = PyJCommandLineArgumentParser(prog="pyjsort", description="Sorts items in its input.")
         ret_parser.add_argument("cli_vars", nargs="*", help="Zero or more JSON objects to sort. These are treated implicitly as a list.")
-        ret_parser.add_argument("-k", "--key", help="JSONPath to the key to be used for sorting items.")
+        ret_parser.add_argument("-k", "--key", action="append", 
+                                help="JSONPath to the key to be used for sorting items, optionally followed by :type "
+                                     "and :r (reverse). May be given more than once.")
         ret_parser.add_argument("-r", "--reverse", default=False, action="store_true", help="Sort in reverse order.")
+        ret_parser.add_argument("-n", "--head", dest="head", type=int, 
+                                help="Only return the first HEAD items of the sorted output.")
+        merge_or_check = ret_parser.add_mutually_exclusive_group()
+        merge_or_check.add_argument("-m", "--merge", default=False, action="store_true", 
+                                    help="Merge already sorted files (- for stdin).")
+        merge_or_check.add_argument("-c", "--check", default=False, action="store_true", 
+                                    help="Check whether the input is sorted.")
+        ret_parser.add_argument("-S", "--buffer-size", dest="buffer_size", 
+                                help="Use at most this much memory for items, spilling sorted runs to disk beyond it "
+                                     "(e.g. 500M).")
+        ret_parser.add_argument("-T", "--temporary-directory", dest="temporary_directory", 
+                                help="Directory for the sorted runs.")
+        ret_parser.add_argument("--parallel", type=int, 
+                                help="Number of worker processes that compute keys and sort (0 for one per CPU).")
         return ret_parser
         
+    def on_encode_result(self, exec_result):
+        if self.script_args.check:
+            # Like sort -c, a sorted input produces no output.
+            return ""
+        return super().on_encode_result(exec_result)
+        
+    def _merge(self, file_paths):
+        streams = []
+        try:
+            for a_path in file_paths:
+                streams.append(sys.stdin if a_path == "-" else open(a_path, "rt", encoding="utf-8"))
+        except BaseException:
+            for a_stream in streams:
+                if a_stream is not sys.stdin:
+                    a_stream.close()
+            raise
+        merged = _merge_streams(streams, make_sort_key(self.script_args.key), self.script_args.reverse)
+        if self.script_args.head is not None:
+            return itertools.islice(merged, max(self.script_args.head, 0))
+        return merged
+        
+    def _check(self, items):
+        """
+        Stops at the first item that is out of order, exiting with status 1.
+        """
+        get_key = make_sort_key(self.script_args.key)
+        reverse = self.script_args.reverse
+        previous_key = None
+        for k, an_item in enumerate(items):
+            a_key = get_key(an_item)
+            if k and (previous_key < a_key if reverse else a_key < previous_key):
+                print(f"pyjsort: disorder at item {k + 1}: {json_dumps(an_item)}", file=sys.stderr)
+                sys.exit(1)
+            previous_key = a_key
+        return []
+        
+    def _sort(self, items):
+        """
+        Sorts an iterable of items, in memory or through sorted runs on disk.
+        
+        :returns: A list of sorted items, or a generator of them if they were sorted on disk.
+        """
+        workers = self.script_args.parallel
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        if workers is not None and workers > 1:
+            return self._parallel_sort(items, workers)
+        get_key = make_sort_key(self.script_args.key)
+        if self.script_args.head is not None:
+            # Equivalent to (the first items of) a stable sort, including ties.
+            select_head = heapq.nlargest if self.script_args.reverse else heapq.nsmallest
+            return select_head(max(self.script_args.head, 0), items, key=get_key)
+        if self.script_args.buffer_size is None:
+            return sorted(items, key=get_key, reverse=self.script_args.reverse)
+        return self._external_sort(((get_key(an_item), an_item) for an_item in items), 
+                                   parse_buffer_size(self.script_args.buffer_size))
+                                   
+    def _parallel_sort(self, items, workers):
+        import concurrent.futures
+        
+        key_specs = tuple(self.script_args.key or ())
+        reverse = self.script_args.reverse
+        pair_key = operator.itemgetter(0)
+        # Checks the keys before any worker starts (forked workers also inherit the compiled keys).
+        _get_sort_key(key_specs)
+        chunks = _iter_chunks(items, PARALLEL_CHUNK_SIZE)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            if self.script_args.head is None and self.script_args.buffer_size is None:
+                pairs = []
+                sort_chunk = functools.partial(_sort_chunk, key_specs, reverse)
+                for a_chunk, a_sorted_chunk in _map_chunks(executor, sort_chunk, chunks, 2 * workers):
+                    pairs.extend((a_key, a_chunk[k]) for a_key, k in a_sorted_chunk)
+                # The sorted chunks are runs that a stable sort merges in their input order.
+                pairs.sort(key=pair_key, reverse=reverse)
+                return [a_pair[1] for a_pair in pairs]
+                
+            # Only the keys are computed in parallel, as the items are consumed in order.
+            compute_keys = functools.partial(_compute_chunk_keys, key_specs)
+            pairs = (a_pair 
+                     for a_chunk, chunk_keys in _map_chunks(executor, compute_keys, chunks, 2 * workers) 
+                     for a_pair in zip(chunk_keys, a_chunk))
+            if self.script_args.head is not None:
+                select_head = heapq.nlargest if reverse else heapq.nsmallest
+                return [a_pair[1] for a_pair in select_head(max(self.script_args.head, 0), pairs, key=pair_key)]
+            return self._external_sort(pairs, parse_buffer_size(self.script_args.buffer_size))
+                                   
+    def _external_sort(self, pairs, buffer_size):
+        """
+        Sorts ``(key, item)`` pairs in runs of at most ``buffer_size`` bytes.
+        """
+        pair_key = operator.itemgetter(0)
+        reverse = self.script_args.reverse
+        temp_dir = None
+        run_paths = []
+        run_pairs = []
+        run_size = 0
+        try:
+            for k, a_pair in enumerate(pairs):
+                if not k % SIZE_SAMPLE_INTERVAL:
+                    item_size = _estimate_size(a_pair[1])
+                run_pairs.append(a_pair)
+                run_size += item_size
+                if run_size >= buffer_size:
+                    if temp_dir is None:
+                        temp_dir = tempfile.mkdtemp(prefix="pyjsort-", dir=self.script_args.temporary_directory)
+                    run_pairs.sort(key=pair_key, reverse=reverse)
+                    run_paths.append(_write_run(run_pairs, temp_dir))
+                    run_pairs = []
+                    run_size = 0
+                    
+            run_pairs.sort(key=pair_key, reverse=reverse)
+            if not run_paths:
+                # Everything fitted in memory
+                return [a_pair[1] for a_pair in run_pairs]
+            if run_pairs:
+                run_paths.append(_write_run(run_pairs, temp_dir))
+        except BaseException:
+            if temp_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+        del run_pairs
+        return _merge_runs(run_paths, temp_dir, reverse)
+        
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
+        if self.script_args.merge:
+            return self._merge([str(a_path) for a_path in self.script_args.cli_vars] or ["-"])
         if not len(self.script_args.cli_vars):
             return None
-
-        if not self.script_args.key:
-            index = [(u, u) for u in self.script_args.cli_vars]
-        else:
-            jsonpath_exp = jsonpath2.Path.parse_str(self.script_args.key)
-            query_results = map(lambda x:x.current_value, jsonpath_exp.match(self.script_args.cli_vars))
-            index=list(zip(query_results, self.script_args.cli_vars))
-        
-        return json.dumps(list(map(lambda x:x[1], sorted(index, key=lambda x:x[0], reverse = self.script_args.reverse))))
+        if self.script_args.check:
+            return self._check(self.script_args.cli_vars)
+        return self._sort(self.script_args.cli_vars)
 
     def on_exec_over_stdin(self, before_exec_result, *args, **kwargs):
         # TODO: HIGH, This needs a try, catch to catch any JSON conversion errors.
-        stdin_data = json.load(sys.stdin)
-        if type(stdin_data) is not list:
-            raise TypeError(f"pyjsort expects a list in its input, received {type(stdin_data)}")
-        
-        # TODO: HIGH, Reduce code duplication in the functionality of these scripts.
-        if not self.script_args.key:
-            index = [(u, u) for u in stdin_data]
-        else:
-            jsonpath_exp = jsonpath2.Path.parse_str(self.script_args.key)
-            query_results = map(lambda x:x.current_value, jsonpath_exp.match(stdin_data))
-            index=list(zip(query_results, stdin_data))
-        
-        return json.dumps(list(map(lambda x:x[1], sorted(index, key=lambda x:x[0], reverse = self.script_args.reverse))))
+        if self.script_args.check:
+            return self._check(iter_json_items(sys.stdin, mode="list"))
+        return self._sort(iter_json_items(sys.stdin, mode="list"))
@@ -7,9 +7,8 @@ PyJSplit splits a JSON file containing lists of items, to one or more files.
 """
 
 import sys
-import json
 import argparse
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser, iter_json_items, json_dumps
 
 
 class PyJSplit(BasePyJUnixFunction):
@@ -64,11 +63,8 @@ class PyJSplit(BasePyJUnixFunction):
             return chr(97 + rem) 
 
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
-        # Load the data file
-        json_data = json.load(self.script_args.json_file)
-        # Basic validation here to throw an error if the file is not a list<any>
-        if type(json_data) is not list:
-            raise TypeError(f"PyJSplit expects list in {self.script_args.json_file.name}, received {type(json_data)}")
+        # The data file is read item by item, only one part file is held in memory at any time.
+        json_data = iter_json_items(self.script_args.json_file, mode="list")
         
         # In the following block, a function that determines the file name is built up.
         if self.script_args.use_numeric_suffix:
@@ -89,11 +85,11 @@ class PyJSplit(BasePyJUnixFunction):
                 current_file_contents_n+=1
             else:
                 with open(part_file_name(current_file_idx), "wt") as fd:
-                    json.dump(current_file_contents, fd)
+                    fd.write(json_dumps(current_file_contents))
                 current_file_idx += 1
                 current_file_contents = [a_row]
                 current_file_contents_n = 1
         # Write the last batch to the disk
         with open(part_file_name(current_file_idx), "wt") as fd:
-                    json.dump(current_file_contents, fd)
-        return json.dumps({})
+                    fd.write(json_dumps(current_file_contents))
+        return {}
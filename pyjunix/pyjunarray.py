@@ -7,8 +7,7 @@ PyJUnArray unpacks items from an array.
 """
 
 import sys
-import json
-from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser
+from .core import BasePyJUnixFunction, PyJCommandLineArgumentParser, iter_json_items
 
 class PyJUnArray(BasePyJUnixFunction):
     """
@@ -30,6 +29,9 @@ class PyJUnArray(BasePyJUnixFunction):
 
     """
     
+    # Unpacked items are always emitted one per line.
+    stream_format = "ndjson"
+    
     def on_get_parser(self):
         ret_parser = PyJCommandLineArgumentParser(prog="pyjunarray", description="Unpacks JSON objects from an array.")
         ret_parser.add_argument("cli_vars", nargs="*", help="List of arrays to unpack to a JSON array.")
@@ -49,11 +51,8 @@ class PyJUnArray(BasePyJUnixFunction):
         for an_arg in self.script_args.cli_vars:
             result.extend(an_arg)
             
-        return json.dumps(result)
+        return result
 
     def on_exec_over_stdin(self, before_exec_result, *args, **kwargs):
-        json_list_in_stdin = json.load(sys.stdin)
-        if not type(json_list_in_stdin) is list:
-            raise TypeError(f"pyjunarray expects list in stdin, received {type(json_list_in_stdin)}")
-        return "\n".join([json.dumps(u) for u in json_list_in_stdin])
+        yield from iter_json_items(sys.stdin, mode="array")
         
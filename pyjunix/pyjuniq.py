@@ -6,28 +6,290 @@ PyJUniq returns unique items from a list of items.
 
 """
 
+import os
 import sys
-import json
-from .core import BasePyJUnixFunction, PyJUnixException, PyJCommandLineArgumentParser
-import deepdiff
+import math
+import heapq
+import pickle
+import shutil
+import operator
+import tempfile
+import functools
+import itertools
+from .core import (BasePyJUnixFunction, PyJUnixException, PyJCommandLineArgumentParser, iter_json_items, json_hash, 
+                   json_canonical, compile_record_jsonpath)
 import collections
 
 import pdb
 
+# Number of records that are written to (and read back from) a partition at a time.
+PARTITION_BATCH_SIZE = 512
+
+
+class HyperLogLog:
+    """
+    Estimates the number of distinct items of a stream in fixed memory.
+    
+    Each item is hashed (see ``json_hash()``) to one of ``2 ** precision`` registers, which keeps the longest run of 
+    leading zeros seen in the rest of the hash. The relative standard error of the estimate is about 
+    ``1.04 / sqrt(2 ** precision)`` (0.8% for the default precision of 14, which takes 16KB).
+    """
+    
+    def __init__(self, precision=14):
+        """
+        :param precision: The number of bits of the hash that select a register (4 to 18).
+        :type precision: int
+        """
+        if not 4 <= precision <= 18:
+            raise PyJUnixException(f"HyperLogLog precision should be between 4 and 18, received {precision}")
+        self._precision = precision
+        self._registers = bytearray(1 << precision)
+        
+    def add(self, item):
+        item_hash = int.from_bytes(json_hash(item)[:8], "big")
+        rest_bits = 64 - self._precision
+        register = item_hash >> rest_bits
+        rank = rest_bits - (item_hash & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self._registers[register]:
+            self._registers[register] = rank
+            
+    def estimate(self):
+        """
+        Returns the estimated number of distinct items added so far.
+        
+        :rtype: int
+        """
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / sum(2.0 ** -a_register for a_register in self._registers)
+        empty_registers = self._registers.count(0)
+        # Small cardinalities are estimated more accurately by the number of registers that are still empty.
+        if estimate <= 2.5 * m and empty_registers:
+            estimate = m * math.log(m / empty_registers)
+        return round(estimate)
+        
+        
+class BloomFilter:
+    """
+    Remembers which items of a stream have been seen, without storing them.
+    
+    An item that has not been seen may be reported as seen with probability ``error_rate``, items that have been seen
+    are always reported as such. The filter does not need to know the length of the stream in advance. Whenever it 
+    fills up, a new filter of twice the capacity and half the error rate is added, so that the total error rate never 
+    exceeds ``error_rate`` (see Almeida et al., "Scalable Bloom Filters", 2007). Memory grows with the number of 
+    distinct items, at about 2 bytes per item for the default error rate.
+    """
+    
+    def __init__(self, error_rate=0.001, initial_capacity=65536):
+        """
+        :param error_rate: The probability that an item is wrongly reported as seen.
+        :type error_rate: float
+        :param initial_capacity: The number of items that the first filter is sized for.
+        :type initial_capacity: int
+        """
+        if not 0 < error_rate < 1:
+            raise PyJUnixException(f"Bloom filter error rate should be between 0 and 1, received {error_rate}")
+        self._error_rate = error_rate
+        self._capacity = initial_capacity
+        # Each filter is (bits, number of bits, number of hashes, capacity, number of items added).
+        self._filters = []
+        self._add_filter()
+        
+    def _add_filter(self):
+        # The error rates of successive filters (error_rate / 2, error_rate / 4, ...) add up to error_rate.
+        filter_error_rate = self._error_rate / (2 ** (len(self._filters) + 1))
+        capacity = self._capacity << len(self._filters)
+        num_bits = math.ceil(-capacity * math.log(filter_error_rate) / math.log(2) ** 2)
+        num_hashes = max(1, round(-math.log2(filter_error_rate)))
+        self._filters.append([bytearray((num_bits + 7) // 8), num_bits, num_hashes, capacity, 0])
+        
+    def add(self, item):
+        """
+        Adds an item to the filter.
+        
+        :returns: Whether the item had (probably) been added before.
+        :rtype: bool
+        """
+        item_hash = json_hash(item)
+        # The positions of an item are derived from two independent 64 bit hashes (Kirsch and Mitzenmacher).
+        hash_1 = int.from_bytes(item_hash[:8], "little")
+        hash_2 = int.from_bytes(item_hash[8:], "little") | 1
+        for bits, num_bits, num_hashes, capacity, count in self._filters:
+            for k in range(num_hashes):
+                position = (hash_1 + k * hash_2) % num_bits
+                if not bits[position >> 3] & (1 << (position & 7)):
+                    break
+            else:
+                return True
+                
+        current_filter = self._filters[-1]
+        if current_filter[4] >= current_filter[3]:
+            self._add_filter()
+            current_filter = self._filters[-1]
+        bits, num_bits, num_hashes = current_filter[:3]
+        for k in range(num_hashes):
+            position = (hash_1 + k * hash_2) % num_bits
+            bits[position >> 3] |= 1 << (position & 7)
+        current_filter[4] += 1
+        return False
+        
+        
+def make_uniq_key(key_expressions):
+    """
+    Returns a function that extracts the part of an item that identifies it, given the JSONPath expressions of one or
+    more keys (over the whole list, e.g. ``$[*].user``, or over each item, e.g. ``$.user``).
+    
+    The value of a key is a single value, or a list of values if the key selects more than one (or none). The values of 
+    more than one key are returned as a list. Without any keys, items are identified by themselves.
+    """
+    if not key_expressions:
+        return None
+    key_paths = [compile_record_jsonpath(an_expression) for an_expression in key_expressions]
+    if len(key_paths) == 1:
+        return lambda an_item: _unwrap(key_paths[0].values(an_item))
+    return lambda an_item: [_unwrap(a_key_path.values(an_item)) for a_key_path in key_paths]
+    
+    
+def _unwrap(key_values):
+    return key_values[0] if len(key_values) == 1 else key_values
+    
+    
+def _count_key(value):
+    # Strings are counted under themselves. Every other item is counted under its canonical encoding, which is also 
+    # how a number, boolean or null key of an object would be encoded, but does not merge 1, 1.0 and true.
+    if isinstance(value, str):
+        return value
+    return json_canonical(value)
+    
+    
+def _count_items(entries):
+    """
+    Maps the key of each counted item (see ``_count_key()``) to its count.
+    
+    A string and another item that are encoded to the same key (e.g. ``"1"`` and ``1``) add up to a single count.
+    
+    :param entries: Pairs of distinct items (or keys) and their counts.
+    :rtype: dict
+    """
+    counts = {}
+    for a_value, a_count in entries:
+        a_key = _count_key(a_value)
+        counts[a_key] = counts.get(a_key, 0) + a_count
+    return counts
+    
+    
+def _write_records(records, file_path):
+    """
+    Writes an iterable of records (tuples) to a file, in batches.
+    """
+    with open(file_path, "wb") as fd:
+        for a_batch in iter(lambda: list(itertools.islice(records, PARTITION_BATCH_SIZE)), []):
+            pickle.dump(a_batch, fd, protocol=pickle.HIGHEST_PROTOCOL)
+            
+            
+def _read_records(file_path):
+    """
+    Reads back the records of a file written by ``_write_records()`` (or ``_partition_items()``).
+    """
+    with open(file_path, "rb", buffering=65536) as fd:
+        while True:
+            try:
+                a_batch = pickle.load(fd)
+            except EOFError:
+                return
+            yield from a_batch
+            
+            
+def _partition_items(items, get_key, num_partitions, temp_dir):
+    """
+    Distributes items to ``num_partitions`` files by their hash, so that equal items end up in the same file.
+    
+    Each item is stored as an ``(item_hash, index, item)`` record, where ``index`` is its position in the input.
+    
+    :returns: The paths of the partitions.
+    :rtype: list
+    """
+    partition_paths = [os.path.join(temp_dir, f"{k}.part") for k in range(num_partitions)]
+    partition_fds = []
+    try:
+        for a_path in partition_paths:
+            partition_fds.append(open(a_path, "wb"))
+        batches = [[] for a_path in partition_paths]
+        for index, an_item in enumerate(items):
+            item_hash = json_hash(an_item if get_key is None else get_key(an_item))
+            partition = int.from_bytes(item_hash[-4:], "little") % num_partitions
+            batches[partition].append((item_hash, index, an_item))
+            if len(batches[partition]) == PARTITION_BATCH_SIZE:
+                pickle.dump(batches[partition], partition_fds[partition], protocol=pickle.HIGHEST_PROTOCOL)
+                batches[partition] = []
+        for a_batch, partition_fd in zip(batches, partition_fds):
+            if a_batch:
+                pickle.dump(a_batch, partition_fd, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        for partition_fd in partition_fds:
+            partition_fd.close()
+    return partition_paths
+    
+    
+def _iter_partition_results(result_paths, temp_dir, ordered):
+    """
+    Reads back the results of all partitions, removing ``temp_dir`` once done.
+    
+    With ``ordered``, the results are merged in the order of the first occurence of their items, otherwise they are 
+    returned partition by partition.
+    """
+    try:
+        if ordered:
+            yield from heapq.merge(*map(_read_records, result_paths), key=operator.itemgetter(0))
+        else:
+            for a_path in result_paths:
+                yield from _read_records(a_path)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        
+        
+def _uniq_partition(repeated, unique, partition_path):
+    """
+    Applies ``uniq`` to a partition (possibly within a worker process).
+    
+    The distinct items of the partition are written over it as ``(index, item, count)`` records, where ``index`` is 
+    the position of the first occurence of the item in the input, in the order of their first occurence.
+    
+    :returns: The path of the results.
+    :rtype: str
+    """
+    hash_lookup = {}
+    for item_hash, index, an_item in _read_records(partition_path):
+        entry = hash_lookup.get(item_hash)
+        if entry is None:
+            hash_lookup[item_hash] = [index, an_item, 1]
+        else:
+            entry[2] += 1
+    entries = hash_lookup.values()
+    if repeated:
+        entries = filter(lambda x:x[2]>1, entries)
+    elif unique:
+        entries = filter(lambda x:x[2]==1, entries)
+    # Items are read in input order, therefore entries are already ordered by their first occurence.
+    _write_records(map(tuple, entries), partition_path)
+    return partition_path
+    
+    
 class PyJUniq(BasePyJUnixFunction):
     """
     Returns unique items from a list of items.
     
     This script deviates from the typical function of the ``uniq`` unix script in that it does not expect its input to 
-    be sorted. This is because it indexes each item by its hash. The rest of the switches correspond to those of
-    unix' ``uniq``.
+    be sorted. This is because it indexes each item by its hash (see ``json_hash()``). The rest of the switches 
+    correspond to those of unix' ``uniq``.
     
     It expects its input formatted as a list and it can operate either via a list of arguments or a list JSON object 
-    loaded from ``stdin``.
+    (or newline delimited JSON items) read from ``stdin``. Items read from ``stdin`` are indexed as they are parsed, 
+    rather than after loading the whole list.
     
     ::
     
-        usage: pyjuniq [-h] [-c] [-d] [-u] [cli_vars [cli_vars ...]]
+        usage: pyjuniq [-h] [-c] [-d] [-u] [-k KEY] [--ordered] [--approx-count | --bloom | --sorted] [--precision PRECISION] [--error-rate ERROR_RATE] [--partitions PARTITIONS] [-T TEMPORARY_DIRECTORY] [--parallel PARALLEL] [cli_vars [cli_vars ...]]
 
         Returns unique items from a list of JSON objects.
 
@@ -39,7 +301,66 @@ class PyJUniq(BasePyJUnixFunction):
           -c, --count     Prefix items by number of occurences (returns object)
           -d, --repeated  Only return duplicate items, one for each occurence
           -u, --unique    Only return unique items
+          -k KEY, --key KEY
+                          JSONPath to the key that identifies items. May be
+                          given more than once.
+          --ordered       Return items in the order of their first occurence
+          --approx-count  Only return the (estimated) number of distinct items
+          --bloom         Return the first occurence of each item as it is
+                          read, without storing the items (some items may be
+                          left out)
+          --precision PRECISION
+                          Precision of --approx-count (4 to 18, default: 14)
+          --error-rate ERROR_RATE
+                          Probability that --bloom leaves out an item that has
+                          not been seen before (default: 0.001)
+          --sorted        Only compare adjacent items, returning items as
+                          they are read (the input is expected to be sorted).
+                          With -c, memory grows with the number of distinct
+                          items
+          --partitions PARTITIONS
+                          Spill items to this many partitions on disk and
+                          apply uniq to each one of them separately
+          -T TEMPORARY_DIRECTORY, --temporary-directory TEMPORARY_DIRECTORY
+                          Directory for the partitions
+          --parallel PARALLEL
+                          Number of worker processes that apply uniq to
+                          partitions (0 for one per CPU)
       
+    With ``-k``, items are identified by one or more of their keys (e.g. ``$[*].user``) rather than by their whole 
+    content. Only the keys are hashed and the first item with each key is returned.
+    
+    ``-c`` returns an object that maps each item (or the value of its key, with ``-k``) to its number of occurences. 
+    Strings are mapped as they are. All other items (or keys) are mapped by their canonical JSON encoding (see 
+    ``json_canonical()``), therefore ``1``, ``1.0`` and ``true`` are counted separately, while ``"1"`` is counted 
+    along with ``1``.
+    
+    With ``--sorted``, the script works like unix' ``uniq``. Only adjacent items (or items with the same key) are 
+    compared and each run of equal items is returned as soon as it ends. This takes constant memory, but items that 
+    are equal and not adjacent are returned more than once, therefore the input should be sorted (e.g. by ``pyjsort`` 
+    on the same keys).
+    
+    ``--sorted -c`` does not stream. It returns a single object once the input ends, in which the runs of each item are 
+    added up (and ``-d`` or ``-u`` apply to the totals), therefore the counts are exact regardless of the order of the 
+    input. This object takes memory proportional to the number of distinct items (or keys).
+    
+    By default, all distinct items are held in memory. With ``--partitions N``, items are first written to ``N`` 
+    files on disk (in ``-T``), by their hash, so that equal items end up in the same file. Each file is then processed 
+    on its own (by ``--parallel`` worker processes, if given), holding about ``1 / N`` of the distinct items in memory 
+    at a time. ``-c``, ``-d``, ``-u`` and ``-k`` apply as usual.
+    
+    Items are returned in no particular order, unless ``--ordered`` is given, in which case they are returned in the 
+    order that they first occur in the input.
+    
+    For inputs too large to keep every distinct item in memory, two approximate modes are available. Neither can be
+    combined with ``-c``, ``-d`` or ``-u``.
+    
+    ``--approx-count`` returns an estimate of the number of distinct items, computed by a ``HyperLogLog`` in fixed 
+    memory (16KB with the default ``--precision``, for an error of about 0.8%).
+    
+    ``--bloom`` returns the first occurence of each item as soon as it is read, remembering the items that have been 
+    seen in a ``BloomFilter`` rather than storing them. A small fraction of items (``--error-rate``) may be mistaken for
+    items that have been seen before and left out, but no item is ever returned twice.
     """
     
     def on_get_parser(self):
@@ -51,17 +372,154 @@ class PyJUniq(BasePyJUnixFunction):
         ret_parser.add_argument("-d", "--repeated", action="store_true", help="Only return duplicate items, "
                                 "one for each occurence")
         ret_parser.add_argument("-u", "--unique", action="store_true", help="Only return unique items")
+        ret_parser.add_argument("-k", "--key", action="append", 
+                                help="JSONPath to the key that identifies items. May be given more than once.")
+        ret_parser.add_argument("--ordered", action="store_true", 
+                                help="Return items in the order of their first occurence")
+        approx_group = ret_parser.add_mutually_exclusive_group()
+        approx_group.add_argument("--approx-count", dest="approx_count", action="store_true", 
+                                  help="Only return the (estimated) number of distinct items")
+        approx_group.add_argument("--bloom", action="store_true", help="Return the first occurence of each item as it "
+                                  "is read, without storing the items (some items may be left out)")
+        approx_group.add_argument("--sorted", action="store_true", help="Only compare adjacent items, returning "
+                                  "items as they are read (the input is expected to be sorted). With -c, memory "
+                                  "grows with the number of distinct items")
+        ret_parser.add_argument("--precision", type=int, default=14, 
+                                help="Precision of --approx-count (4 to 18, default: 14)")
+        ret_parser.add_argument("--error-rate", dest="error_rate", type=float, default=0.001, 
+                                help="Probability that --bloom leaves out an item that has not been seen before "
+                                "(default: 0.001)")
+        ret_parser.add_argument("--partitions", type=int, help="Spill items to this many partitions on disk and apply "
+                                "uniq to each one of them separately")
+        ret_parser.add_argument("-T", "--temporary-directory", dest="temporary_directory", 
+                                help="Directory for the partitions")
+        ret_parser.add_argument("--parallel", type=int, help="Number of worker processes that apply uniq to "
+                                "partitions (0 for one per CPU)")
         return ret_parser
         
+    def on_validate_args(self, *args, **kwargs):
+        if (self.script_args.approx_count or self.script_args.bloom) and \
+           (self.script_args.count or self.script_args.repeated or self.script_args.unique):
+            raise PyJUnixException("pyjuniq --approx-count and --bloom can not be combined with -c, -d or -u")
+        if self.script_args.partitions is not None:
+            if self.script_args.partitions < 1:
+                raise PyJUnixException(f"pyjuniq expects at least one partition, received "
+                                       f"{self.script_args.partitions}")
+            if self.script_args.approx_count or self.script_args.bloom or self.script_args.sorted:
+                raise PyJUnixException("pyjuniq --partitions can not be combined with --approx-count, --bloom or "
+                                       "--sorted")
+        return True
+        
     @staticmethod
-    def _uniq_over_list(a_list, repeated, unique, count):
+    def _approx_count(items, precision, get_key=None):
+        """
+        Estimates the number of distinct items.
+        """
+        distinct_items = HyperLogLog(precision)
+        for an_item in items:
+            distinct_items.add(an_item if get_key is None else get_key(an_item))
+        return distinct_items.estimate()
+        
+    @staticmethod
+    def _bloom_uniq(items, error_rate, get_key=None):
+        """
+        Returns the first occurence of each item as it is read.
+        """
+        seen_items = BloomFilter(error_rate)
+        for an_item in items:
+            if not seen_items.add(an_item if get_key is None else get_key(an_item)):
+                yield an_item
+                
+    @staticmethod
+    def _iter_runs(items, get_key=None):
+        """
+        Groups adjacent equal items, returning the first item and the length of each run.
+        """
+        run_item, run_hash, run_count = None, None, 0
+        for an_item in items:
+            item_hash = json_hash(an_item if get_key is None else get_key(an_item))
+            if item_hash == run_hash:
+                run_count += 1
+                continue
+            if run_count:
+                yield run_item, run_count
+            run_item, run_hash, run_count = an_item, item_hash, 1
+        if run_count:
+            yield run_item, run_count
+            
+    @classmethod
+    def _uniq_sorted(cls, items, repeated, unique, count, get_key=None):
+        """
+        Implements the ``uniq`` functionality over adjacent items.
+        """
+        runs = cls._iter_runs(items, get_key)
+        if count:
+            # Runs of the same item that are not adjacent (over unsorted input) add up to the same count, before 
+            # duplicate or unique items are picked.
+            totals = {}
+            for a_value, a_count in runs:
+                a_key = a_value if get_key is None else get_key(a_value)
+                totals.setdefault(json_canonical(a_key), [a_key, 0])[1] += a_count
+            entries = totals.values()
+            if repeated:
+                entries = filter(lambda x:x[1]>1, entries)
+            elif unique:
+                entries = filter(lambda x:x[1]==1, entries)
+            return _count_items(entries)
+        if repeated:
+            runs = filter(lambda x:x[1]>1, runs)
+        elif unique:
+            runs = filter(lambda x:x[1]==1, runs)
+        return map(lambda x:x[0], runs)
+        
+    def _uniq(self, items):
+        get_key = make_uniq_key(self.script_args.key)
+        if self.script_args.approx_count:
+            return self._approx_count(items, self.script_args.precision, get_key)
+        if self.script_args.bloom:
+            return self._bloom_uniq(items, self.script_args.error_rate, get_key)
+        if self.script_args.sorted:
+            return self._uniq_sorted(items, self.script_args.repeated, self.script_args.unique, self.script_args.count, 
+                                     get_key)
+        if self.script_args.partitions is not None:
+            return self._uniq_partitioned(items, get_key)
+        return self._uniq_over_list(items, self.script_args.repeated, self.script_args.unique, self.script_args.count, 
+                                    get_key, self.script_args.ordered)
+                                    
+    def _uniq_partitioned(self, items, get_key=None):
+        """
+        Implements the ``uniq`` functionality over partitions of the items on disk.
+        """
+        temp_dir = tempfile.mkdtemp(prefix="pyjuniq-", dir=self.script_args.temporary_directory)
+        try:
+            partition_paths = _partition_items(items, get_key, self.script_args.partitions, temp_dir)
+            uniq_partition = functools.partial(_uniq_partition, self.script_args.repeated, self.script_args.unique)
+            if self.script_args.parallel is None:
+                result_paths = list(map(uniq_partition, partition_paths))
+            else:
+                import concurrent.futures
+                
+                workers = self.script_args.parallel or os.cpu_count() or 1
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                    result_paths = list(executor.map(uniq_partition, partition_paths))
+        except BaseException:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+        entries = _iter_partition_results(result_paths, temp_dir, self.script_args.ordered)
+        if self.script_args.count:
+            get_value = (lambda x:x) if get_key is None else get_key
+            return _count_items((get_value(an_item), a_count) for index, an_item, a_count in entries)
+        return map(operator.itemgetter(1), entries)
+        
+    @staticmethod
+    def _uniq_over_list(a_list, repeated, unique, count, get_key=None, ordered=False):
         """
         Implements the ``uniq`` functionality over a JSON list.
         """
         # Create a dictionary that is indexed by hash and maintains attributes "value" and "count".
         hash_lookup = {}
         for an_item in a_list:
-            item_hash = deepdiff.deephash.DeepHash(an_item)[an_item]
+            item_hash = json_hash(an_item if get_key is None else get_key(an_item))
             if item_hash not in hash_lookup: 
                 hash_lookup[item_hash] = {"value":an_item, "count":1}
             else:
@@ -73,29 +531,25 @@ class PyJUniq(BasePyJUnixFunction):
             ret_items = dict(filter(lambda x:x[1]["count"]>1, hash_lookup.items()))
         elif unique:
             ret_items = dict(filter(lambda x:x[1]["count"]==1, hash_lookup.items()))
+        elif ordered:
+            ret_items = hash_lookup
         else:
             ret_items = dict([(u, hash_lookup[u]) for u in set(hash_lookup.keys())])
             
         if count:
-            ret_items = dict(map(lambda x:(x[1]["value"], x[1]["count"]), ret_items.items()))
-            return json.dumps(ret_items)
+            get_value = (lambda x:x) if get_key is None else get_key
+            return _count_items(map(lambda x:(get_value(x[1]["value"]), x[1]["count"]), ret_items.items()))
             
         # Finally, return the resulting object of results.
-        return json.dumps(list(map(lambda x:x[1]["value"] ,ret_items.items())))
+        return list(map(lambda x:x[1]["value"] ,ret_items.items()))
         
         
     def on_exec_over_params(self, before_exec_result, *args, **kwargs):
         if not self.script_args.cli_vars:
             return None
         
-        return self._uniq_over_list(self.script_args.cli_vars, self.script_args.repeated, self.script_args.unique, 
-                                    self.script_args.count)
-                                    
+        return self._uniq(self.script_args.cli_vars)
+        
     def on_exec_over_stdin(self, before_exec_result, *args, **kwargs):
-        stdin_data = json.load(sys.stdin)
-        if not type(stdin_data) is list:
-            raise TypeError(f"PyJUnique expected list over stdin, received {type(stdin.data)}")
-            
-        return self._uniq_over_list(stdin_data, self.script_args.repeated, self.script_args.unique, 
-                                    self.script_args.count)
-                                    
+        return self._uniq(iter_json_items(sys.stdin, mode="list"))
+        
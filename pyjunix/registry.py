@@ -0,0 +1,116 @@
+"""
+Maps script names to the classes that implement them, importing each one only when it is needed.
+
+Apart from the scripts that ship with PyJUnix, third-party packages can provide their own scripts by declaring an 
+entry point in the ``pyjunix.scripts`` group, named after the script and pointing to a ``BasePyJUnixFunction`` 
+descendant. For example, in ``setup.cfg``:
+
+::
+
+    [options.entry_points]
+    pyjunix.scripts =
+        pyjfoo = pyjfoo.script:PyJFoo
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import importlib
+import collections.abc
+
+# Script name -> (module, class) of the scripts that ship with PyJUnix.
+BUILTIN_SCRIPTS = {
+                   "pyjkeys": ("pyjunix.pyjkeys", "PyJKeys"),
+                   "pyjarray": ("pyjunix.pyjarray", "PyJArray"),
+                   "pyjunarray": ("pyjunix.pyjunarray", "PyJUnArray"),
+                   "pyjls": ("pyjunix.pyjls", "PyJLs"),
+                   "pyjgrep": ("pyjunix.pyjgrep", "PyJGrep"),
+                   "pyjprtprn": ("pyjunix.pyjprtprn", "PyJPrtPrn"),
+                   "pyjsort": ("pyjunix.pyjsort", "PyJSort"),
+                   "pyjlast": ("pyjunix.pyjlast", "PyJLast"),
+                   "pyjps": ("pyjunix.pyjps", "PyJPs"),
+                   "pyjjoin": ("pyjunix.pyjjoin", "PyJJoin"),
+                   "pyjpaste": ("pyjunix.pyjpaste", "PyJPaste"),
+                   "pyjcat": ("pyjunix.pyjcat", "PyJCat"),
+                   "pyjsplit": ("pyjunix.pyjsplit", "PyJSplit"),
+                   "pyjdiff": ("pyjunix.pyjdiff", "PyJDiff"),
+                   "pyjuniq": ("pyjunix.pyjuniq", "PyJUniq"),
+                   "pyjindex": ("pyjunix.pyjindex", "PyJIndex"),
+                   }
+                   
+ENTRY_POINT_GROUP = "pyjunix.scripts"
+
+
+def _iter_entry_points(group):
+    """
+    Returns the entry points of ``group`` across all installed distributions.
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        # Python < 3.8, third-party scripts are not supported.
+        return []
+    all_entry_points = entry_points()
+    if hasattr(all_entry_points, "select"):
+        return all_entry_points.select(group=group)
+    return all_entry_points.get(group, [])
+    
+    
+class PyJScriptRegistry(collections.abc.Mapping):
+    """
+    A read-only mapping of script names to script classes.
+    
+    Looking up a script imports its module (and therefore its dependencies) and nothing else. Entry points are only 
+    scanned if a script is not found among the built-in ones, or if all scripts are listed.
+    """
+    
+    def __init__(self, builtin_scripts=None, entry_point_group=ENTRY_POINT_GROUP):
+        """
+        :param builtin_scripts: Script name -> (module, class), by default ``BUILTIN_SCRIPTS``.
+        :type builtin_scripts: dict
+        :param entry_point_group: The entry point group to discover third-party scripts from (``None`` to disable).
+        :type entry_point_group: str
+        """
+        self._builtin_scripts = dict(builtin_scripts or BUILTIN_SCRIPTS)
+        self._entry_point_group = entry_point_group
+        self._entry_points = None
+        self._loaded = {}
+        
+    def _get_entry_points(self):
+        if self._entry_points is None:
+            self._entry_points = {}
+            if self._entry_point_group:
+                for an_entry_point in _iter_entry_points(self._entry_point_group):
+                    # Built-in scripts can not be shadowed.
+                    if an_entry_point.name not in self._builtin_scripts:
+                        self._entry_points[an_entry_point.name] = an_entry_point
+        return self._entry_points
+        
+    def __getitem__(self, script_name):
+        if script_name not in self._loaded:
+            if script_name in self._builtin_scripts:
+                module_name, class_name = self._builtin_scripts[script_name]
+                self._loaded[script_name] = getattr(importlib.import_module(module_name), class_name)
+            elif script_name in self._get_entry_points():
+                self._loaded[script_name] = self._get_entry_points()[script_name].load()
+            else:
+                raise KeyError(script_name)
+        return self._loaded[script_name]
+        
+    def __iter__(self):
+        yield from self._builtin_scripts
+        yield from self._get_entry_points()
+        
+    def __len__(self):
+        return len(self._builtin_scripts) + len(self._get_entry_points())
+        
+    def __contains__(self, script_name):
+        return script_name in self._builtin_scripts or script_name in self._get_entry_points()
+        
+    def load_all(self):
+        """
+        Imports all scripts (e.g. to have them ready in a long running process).
+        """
+        for a_script_name in self:
+            self[a_script_name]
@@ -0,0 +1,184 @@
+"""
+A persistent ``pyjbox`` server that runs scripts on behalf of the thin ``pyjboxc`` client.
+
+Starting a fresh interpreter and importing PyJUnix (and its dependencies) costs far more than running most scripts
+over small inputs. The server pays that cost once. Every request is then served by a child process that is forked
+from the (already warm) server, so it starts with everything imported and can change its working directory,
+environment and standard streams without affecting anyone else.
+
+The protocol over the Unix domain socket is:
+
+* Client to server: A single line holding a JSON object with the ``argv``, ``cwd`` and (``PYJUNIX_*``) ``env`` of the
+  call, followed by the raw bytes of the client's ``stdin`` until the client shuts down its side of the socket.
+* Server to client: A sequence of frames, each one a single byte channel (``o`` for ``stdout``, ``e`` for ``stderr``,
+  ``x`` for the exit code) followed by the length of the payload as a 4 byte unsigned integer (network order) and the
+  payload itself. The ``x`` frame carries the exit code as a 4 byte signed integer and is always the last one.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import io
+import sys
+import json
+import errno
+import signal
+import socket
+import struct
+import traceback
+import socketserver
+from . import core
+
+FRAME_HEADER = struct.Struct("!cI")
+EXIT_CODE = struct.Struct("!i")
+
+
+def default_socket_path():
+    """
+    Returns the socket path used when none is given, ``$PYJBOX_SOCKET`` or ``pyjbox-<uid>.sock`` in
+    ``$XDG_RUNTIME_DIR`` (or the temporary directory).
+    """
+    return os.environ.get("PYJBOX_SOCKET",
+                          os.path.join(os.environ.get("XDG_RUNTIME_DIR", "/tmp"), f"pyjbox-{os.getuid()}.sock"))
+
+
+class _SocketStdin(io.TextIOWrapper):
+    """
+    The ``stdin`` of a call, read from the socket but named like the real thing (some scripts check for it).
+    """
+
+    name = "<stdin>"
+
+
+class _FrameWriter(io.RawIOBase):
+    """
+    A binary stream that sends everything written to it as frames of one channel.
+    """
+
+    def __init__(self, connection, channel):
+        super().__init__()
+        self._connection = connection
+        self._channel = channel
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._connection.sendall(FRAME_HEADER.pack(self._channel, len(data)) + data)
+        return len(data)
+
+
+class _PyJBoxRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Runs a single call in the forked child that serves it.
+    """
+
+    def handle(self):
+        header = json.loads(self.rfile.readline())
+        os.chdir(header["cwd"])
+        client_env = header.get("env", {})
+        # The call sees the PYJUNIX_* variables of the client, not those that the server was started with.
+        for a_name in [a_name for a_name in os.environ if a_name.startswith("PYJUNIX_") and a_name not in client_env]:
+            del os.environ[a_name]
+        os.environ.update(client_env)
+        core.apply_environment()
+
+        sys.stdin = _SocketStdin(self.rfile, encoding="utf-8")
+        sys.stdout = io.TextIOWrapper(io.BufferedWriter(_FrameWriter(self.connection, b"o"), 65536), encoding="utf-8")
+        sys.stderr = io.TextIOWrapper(io.BufferedWriter(_FrameWriter(self.connection, b"e")), encoding="utf-8",
+                                      line_buffering=True)
+        exit_code = 0
+        try:
+            self.server.dispatch(header["argv"])
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            self.connection.sendall(FRAME_HEADER.pack(b"x", EXIT_CODE.size) + EXIT_CODE.pack(exit_code))
+        except OSError:
+            # The client has gone away, there is nobody to report to.
+            pass
+
+
+class PyJBoxServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves calls to PyJUnix scripts over a Unix domain socket, one forked child per call.
+    """
+
+    def __init__(self, socket_path, dispatch, max_workers=None):
+        """
+        :param socket_path: The path of the socket to listen on.
+        :type socket_path: str
+        :param dispatch: Called with the ``argv`` of each call, within the child that serves it.
+        :type dispatch: callable
+        :param max_workers: Maximum number of calls that are served concurrently (default: number of CPUs).
+        :type max_workers: int
+        """
+        self.dispatch = dispatch
+        self.max_children = max_workers or os.cpu_count() or 1
+        _remove_stale_socket(socket_path)
+        # Only the user that started the server can connect to it.
+        previous_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _PyJBoxRequestHandler)
+        finally:
+            os.umask(previous_umask)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(socket_path):
+    """
+    Removes a socket left behind by a server that is no longer running.
+
+    :raises PyJUnixException: If another server is listening on ``socket_path``.
+    """
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError as e:
+        if e.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+            raise
+        os.unlink(socket_path)
+    else:
+        raise core.PyJUnixException(f"A server is already listening on {socket_path}")
+    finally:
+        probe.close()
+
+
+def serve(dispatch, socket_path=None, max_workers=None):
+    """
+    Runs a ``PyJBoxServer`` until it is interrupted.
+
+    :param dispatch: Called with the ``argv`` of each call (see ``PyJBoxServer``).
+    :type dispatch: callable
+    :param socket_path: The path of the socket to listen on (default: ``default_socket_path()``).
+    :type socket_path: str
+    :param max_workers: Maximum number of calls that are served concurrently.
+    :type max_workers: int
+    """
+    # Terminating the server should also remove its socket.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with PyJBoxServer(socket_path or default_socket_path(), dispatch, max_workers) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
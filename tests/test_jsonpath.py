@@ -0,0 +1,93 @@
+"""
+Checks that natively compiled JSONPath expressions select exactly what ``jsonpath2`` selects.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import json
+import random
+import unittest
+from jsonpath2.path import Path
+from pyjunix.core import CompiledJSONPath
+
+# Expressions that are compiled natively, by kind of step.
+NATIVE_EXPRESSIONS = [
+    # Root and child steps
+    '$', '$.user', '$.parent.pid', '$[*]["user"]', '$[*]["user","pid"]', '$.items[*].a',
+    # Wildcards
+    '$[*]', '$.*', '$[*].*', '$[*].pid', '$[*].parent.active', '$[*].tags[*]',
+    # Indices
+    '$[0]', '$[-1]', '$[0,2]', '$[*].tags[0]',
+    # Slices
+    '$[1:3]', '$[::2]', '$[1:]', '$[:-1]', '$[-2:]',
+    # Filters
+    '$[?(@.tags)]', '$[?(@.pid > 500)].user', '$[?(@.pid != 3)]', '$[?(@.cpu >= 50.5)]', '$[?(@.cpu <= 10)]',
+    '$[?(@.cpu < 10)]', '$[?(not @.parent.active = true)]', '$.items[?(@.a < 2)].b',
+    # Equality comparisons (=), also combined and against other paths
+    '$[?(@.user = "root")]', '$[?(@.user = null)]', '$[?(@.parent.pid = 3)].name', '$[?(@.pid = $[0].pid)]',
+    '$[?(@.user = "root" and @.cpu > 50)].pid', '$[?(@.user = "root" or @.parent.active = true)].pid',
+]
+# Expressions that fall back to jsonpath2.
+FALLBACK_EXPRESSIONS = ['$..pid', '$..tags[0]', '$[*].tags.length()', '$[?(@.tags.length() > 1)]']
+
+USERS = ["root", "alice", "bob", None]
+
+
+def make_record(rnd):
+    """
+    Returns a process-like record, with some of its keys missing or of an unexpected type.
+    """
+    record = {"pid": rnd.randint(0, 1000),
+              "user": rnd.choice(USERS),
+              "name": f"process-{rnd.randint(0, 99)}",
+              "cpu": rnd.choice([rnd.randint(0, 100), round(rnd.uniform(0, 100), 1)]),
+              "tags": [rnd.choice(["t0", "t1", "t2"]) for k in range(rnd.randint(0, 3))],
+              "parent": {"pid": rnd.randint(0, 5), "active": rnd.choice([True, False])}}
+    for a_key in list(record):
+        if rnd.random() < 0.1:
+            del record[a_key]
+    if rnd.random() < 0.1:
+        record["pid"] = str(rnd.randint(0, 1000))
+    return record
+    
+    
+def make_documents(seed=0, num_documents=40):
+    """
+    Returns a corpus of documents: lists of records, single records, objects with nested lists and scalars.
+    """
+    rnd = random.Random(seed)
+    documents = [[], {}, None, 3, "root", [1, "a", None, [2]], {"items": [{"a": 1, "b": 2}, {"a": 3}, 4]}]
+    for k in range(num_documents):
+        documents.append([make_record(rnd) for k in range(rnd.randint(0, 8))])
+        documents.append(make_record(rnd))
+        documents.append({"items": [{"a": rnd.randint(0, 3), "b": rnd.choice([1, "x", None])}
+                                    for k in range(rnd.randint(0, 4))]})
+    return documents
+    
+    
+class TestCompiledJSONPath(unittest.TestCase):
+    def assert_same_values(self, expressions, is_native):
+        documents = make_documents()
+        for an_expression in expressions:
+            path = Path.parse_str(an_expression)
+            compiled_path = CompiledJSONPath(path)
+            self.assertEqual(compiled_path.is_native, is_native, an_expression)
+            for a_document in documents:
+                expected_values = [a_match.current_value for a_match in path.match(a_document)]
+                # Compared as JSON, so that values of different types that compare equal in Python (e.g. true and 1)
+                # are told apart.
+                self.assertEqual(json.dumps(compiled_path.values(a_document)), json.dumps(expected_values),
+                                 f"{an_expression} over {json.dumps(a_document)}")
+                                 
+    def test_native_expressions(self):
+        self.assert_same_values(NATIVE_EXPRESSIONS, True)
+        
+    def test_fallback_expressions(self):
+        self.assert_same_values(FALLBACK_EXPRESSIONS, False)
+        
+        
+if __name__ == "__main__":
+    unittest.main()
+    
\ No newline at end of file
@@ -0,0 +1,69 @@
+"""
+Checks how ``pyjgrep`` reports invalid arguments and files that it can not query.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_pyjgrep(*args, input_text=""):
+    """
+    Runs ``pyjgrep`` in a new interpreter.
+    
+    :returns: The completed process, with its output captured as text.
+    :rtype: subprocess.CompletedProcess
+    """
+    return subprocess.run([sys.executable, os.path.join(PROJECT_DIR, "pyjbox.py"), "pyjgrep", *args],
+                          input=input_text, capture_output=True, text=True, cwd=PROJECT_DIR)
+                          
+                          
+class TestPyJGrepValidation(unittest.TestCase):
+    def assert_rejected(self, *args, reason):
+        result = run_pyjgrep(*args)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn(reason, result.stderr)
+        
+    def test_missing_pattern(self):
+        self.assert_rejected(reason="pyjgrep expects a jsonpath pattern")
+        
+    def test_invalid_pattern(self):
+        self.assert_rejected("-e", "$[", ":1", reason="invalid jsonpath pattern $[")
+        
+    def test_duplicate_names(self):
+        self.assert_rejected("-e", "a=$.x", "-e", "a=$.y", ":1", reason="distinct pattern names")
+        
+        
+class TestPyJGrepFiles(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        for a_name, a_content in (("a.json", '[{"a": 1}]'), ("bad.json", '[{"a": 2'), ("c.json", '[{"a": 3}]')):
+            with open(os.path.join(self.temp_dir.name, a_name), "wt", encoding="utf-8") as fd:
+                fd.write(a_content)
+                
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        
+    def test_failed_files_are_skipped(self):
+        file_names = ["a.json", "missing.json", "bad.json", "nomatch*.json", "c.json"]
+        for jobs in ("1", "2"):
+            result = run_pyjgrep("-R", "--files", "-j", jobs, "$[*].a", 
+                                 *[os.path.join(self.temp_dir.name, a_name) for a_name in file_names])
+            self.assertEqual(result.returncode, 2)
+            self.assertEqual([a_result["match"] for a_result in json.loads(result.stdout)], [1, 3])
+            for a_name in file_names[1:4]:
+                self.assertIn(f"{a_name}: ", result.stderr)
+                
+                
+if __name__ == "__main__":
+    unittest.main()
+    
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+Checks that the hash join and the sorted merge join of ``pyjjoin`` pair the same items.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Keys that are equal in Python but not as JSON (true and 1), as well as numbers that are equal by value (1 and 1.0).
+FILE_1 = [[False, "f"], [True, "t"], [0, "zero"], [1, "one"], [1.0, "one point zero"], ["1", "string"]]
+FILE_2 = [[True, "T"], [1, "ONE"], [0.0, "ZERO"], [False, "F"], [2, "TWO"]]
+
+
+def run_pyjbox(*args, input_text=""):
+    """
+    Runs a script through ``pyjbox.py`` in a new interpreter.
+    
+    :returns: The decoded result of the script.
+    """
+    return json.loads(subprocess.run([sys.executable, os.path.join(PROJECT_DIR, "pyjbox.py"), *args], input=input_text,
+                                     capture_output=True, text=True, cwd=PROJECT_DIR, check=True).stdout)
+                                     
+                                     
+class TestPyJJoinKeys(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for a_name, a_content in (("f1", FILE_1), ("f2", FILE_2)):
+            for is_sorted in (False, True):
+                if is_sorted:
+                    a_content = run_pyjbox("pyjsort", "-k", "$[*][0]", input_text=json.dumps(a_content))
+                self.paths[a_name, is_sorted] = os.path.join(self.temp_dir.name, f"{a_name}{int(is_sorted)}.json")
+                with open(self.paths[a_name, is_sorted], "wt", encoding="utf-8") as fd:
+                    json.dump(a_content, fd)
+                    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        
+    def run_pyjjoin(self, *args, is_sorted=False):
+        join_result = run_pyjbox("pyjjoin", *args, *(["--sorted"] if is_sorted else []), 
+                                 self.paths["f1", is_sorted], self.paths["f2", is_sorted])
+        # The two joins return items in different orders.
+        return sorted(join_result, key=json.dumps)
+        
+    def test_mixed_bool_and_int_keys(self):
+        self.assertEqual(self.run_pyjjoin(), sorted([[False, "f", "F"], [True, "t", "T"], [0, "zero", "ZERO"], 
+                                                     [1, "one", "ONE"], [1.0, "one point zero", "ONE"]], 
+                                                    key=json.dumps))
+        for args in ((), ("-a", "1"), ("-a", "2"), ("-v", "1"), ("-v", "2")):
+            self.assertEqual(self.run_pyjjoin(*args, is_sorted=True), self.run_pyjjoin(*args), args)
+            
+            
+if __name__ == "__main__":
+    unittest.main()
+    
\ No newline at end of file
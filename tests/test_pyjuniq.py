@@ -0,0 +1,75 @@
+"""
+Checks that every mode of ``pyjuniq -c`` counts items under the same keys.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Items that are equal in Python but not as JSON, a string that is encoded like a number and objects that only differ 
+# in the order of their keys.
+ITEMS = ["a", "a", "b", 1, 1.0, True, "1", 1, [1, 2], {"b": 1, "a": 2}, {"a": 2, "b": 1}, None]
+EXPECTED_COUNTS = {"a": 2, "b": 1, "1": 3, "1.0": 1, "true": 1, "[1,2]": 1, '{"a":2,"b":1}': 2, "null": 1}
+
+
+def run_pyjuniq(items, *args):
+    """
+    Runs ``pyjuniq`` over a list of items, read from ``stdin``.
+    
+    :returns: The decoded result of the script.
+    """
+    return json.loads(subprocess.run([sys.executable, os.path.join(PROJECT_DIR, "pyjbox.py"), "pyjuniq", *args],
+                                     input=json.dumps(items), capture_output=True, text=True, cwd=PROJECT_DIR,
+                                     check=True).stdout)
+                                     
+                                     
+class TestPyJUniqCount(unittest.TestCase):
+    def test_count(self):
+        self.assertEqual(run_pyjuniq(ITEMS, "-c"), EXPECTED_COUNTS)
+        
+    def test_count_ordered(self):
+        self.assertEqual(list(run_pyjuniq(ITEMS, "-c", "--ordered")), list(EXPECTED_COUNTS))
+        
+    def test_count_partitions(self):
+        self.assertEqual(run_pyjuniq(ITEMS, "-c", "--partitions", "3"), EXPECTED_COUNTS)
+        
+    def test_count_sorted(self):
+        self.assertEqual(run_pyjuniq(ITEMS, "-c", "--sorted"), EXPECTED_COUNTS)
+        
+    def test_count_sorted_adds_up_runs(self):
+        self.assertEqual(run_pyjuniq([1, 2, 1, 1, 2, 3], "-c", "--sorted"), {"1": 3, "2": 2, "3": 1})
+        self.assertEqual(run_pyjuniq([1, 2, 1, 1, 2, 3], "-c", "--sorted", "-d"), {"1": 3, "2": 2})
+        self.assertEqual(run_pyjuniq([1, 2, 1, 1, 2, 3], "-c", "--sorted", "-u"), {"3": 1})
+        
+    def test_count_strings(self):
+        # Strings are counted under themselves, as they always were.
+        self.assertEqual(run_pyjuniq(["a", "a", "b", 1], "-c"), {"a": 2, "b": 1, "1": 1})
+        
+    def test_count_key(self):
+        self.assertEqual(run_pyjuniq([{"u": "x"}, {"u": 1}, {"u": "x"}], "-c", "-k", "$.u"), {"x": 2, "1": 1})
+        
+        
+class TestPyJUniqValidation(unittest.TestCase):
+    def assert_rejected(self, *args, reason):
+        result = subprocess.run([sys.executable, os.path.join(PROJECT_DIR, "pyjbox.py"), "pyjuniq", *args, "1", "2"],
+                                capture_output=True, text=True, cwd=PROJECT_DIR)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn(reason, result.stderr)
+        
+    def test_bloom_with_count(self):
+        self.assert_rejected("--bloom", "-c", reason="can not be combined with -c, -d or -u")
+        
+    def test_no_partitions(self):
+        self.assert_rejected("--partitions", "0", reason="expects at least one partition")
+        
+        
+if __name__ == "__main__":
+    unittest.main()
+    
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""
+Checks that calls through ``pyjboxc`` see the environment of the client, not that of the server.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import sys
+import time
+import tempfile
+import unittest
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCUMENT = '[{"a": 1, "b": [1, 2]}]'
+
+
+class TestServerEnvironment(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, "pyjbox.sock")
+        # The server is started with settings of its own, which calls should not inherit.
+        server_env = dict(os.environ, PYJBOX_SOCKET=self.socket_path, PYJUNIX_STREAM_FORMAT="ndjson")
+        self.server = subprocess.Popen([sys.executable, os.path.join(PROJECT_DIR, "pyjbox.py"), "--serve"],
+                                       env=server_env, cwd=PROJECT_DIR)
+        for k in range(100):
+            if os.path.exists(self.socket_path):
+                break
+            time.sleep(0.05)
+        # Otherwise pyjboxc would quietly run pyjbox.py instead.
+        self.assertTrue(os.path.exists(self.socket_path))
+        
+    def tearDown(self):
+        self.server.terminate()
+        self.server.wait()
+        self.temp_dir.cleanup()
+        
+    def run_pyjboxc(self, *args, input_text=DOCUMENT, **env):
+        client_env = dict({a_name: a_value for a_name, a_value in os.environ.items()
+                           if not a_name.startswith("PYJUNIX_")}, PYJBOX_SOCKET=self.socket_path, **env)
+        return subprocess.run([sys.executable, os.path.join(PROJECT_DIR, "pyjboxc.py"), *args], input=input_text,
+                              capture_output=True, text=True, env=client_env, cwd=PROJECT_DIR, check=True).stdout
+                              
+    def test_same_output_as_pyjbox(self):
+        expected_output = subprocess.run([sys.executable, os.path.join(PROJECT_DIR, "pyjbox.py"), "pyjsort"],
+                                         input=DOCUMENT, capture_output=True, text=True, cwd=PROJECT_DIR,
+                                         check=True).stdout
+        self.assertEqual(self.run_pyjboxc("pyjsort"), expected_output)
+        
+    def test_server_environment_is_dropped(self):
+        self.assertEqual(self.run_pyjboxc("pyjarray", input_text="1\n2\n"), "[1, 2]")
+        self.assertEqual(self.run_pyjboxc("pyjarray", input_text="1\n2\n", PYJUNIX_STREAM_FORMAT="ndjson"), "1\n2\n")
+        
+        
+if __name__ == "__main__":
+    unittest.main()
+    
\ No newline at end of file
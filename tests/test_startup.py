@@ -0,0 +1,68 @@
+"""
+Checks that ``pyjbox`` only imports what the script it runs needs.
+
+:authors: Athanasios Anastasiou
+:date: October 2026
+
+"""
+
+import os
+import sys
+import time
+import unittest
+import subprocess
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Heavy dependencies that scripts such as pyjarray do not need.
+HEAVY_MODULES = ("jsonpath2", "deepdiff", "psutil", "utmp")
+# How many times the start-up of a bare interpreter (``python -c pass``) ``pyjbox.py pyjarray`` may take. Both are 
+# timed on the same machine, so that the check does not depend on its speed. Importing every script up front, as 
+# pyjbox used to, takes about 14 times as long, while importing only what pyjarray needs takes about 3 times as long.
+STARTUP_BUDGET = 8
+
+
+def best_run_time(command, num_runs=5):
+    """
+    Returns the shortest wall clock time (in seconds) of a few runs of a command, to discount the noise of a busy 
+    machine.
+    
+    :rtype: float
+    """
+    run_times = []
+    for k in range(num_runs):
+        start_time = time.perf_counter()
+        subprocess.run(command, input="", capture_output=True, cwd=PROJECT_DIR, check=True)
+        run_times.append(time.perf_counter() - start_time)
+    return min(run_times)
+    
+    
+def run_pyjbox(*args, python_options=()):
+    """
+    Runs ``pyjbox.py`` in a new interpreter over empty input.
+    
+    :returns: The completed process, with its output captured as text.
+    :rtype: subprocess.CompletedProcess
+    """
+    return subprocess.run([sys.executable, *python_options, os.path.join(PROJECT_DIR, "pyjbox.py"), *args],
+                          input="", capture_output=True, text=True, cwd=PROJECT_DIR, check=True)
+                          
+                          
+class TestStartup(unittest.TestCase):
+    def test_pyjarray_does_not_import_heavy_modules(self):
+        # -X importtime lists every module that is imported, one per line of stderr.
+        imported_modules = set()
+        for a_line in run_pyjbox("pyjarray", "1", python_options=("-X", "importtime")).stderr.splitlines():
+            if a_line.startswith("import time:") and a_line.count("|") == 2:
+                imported_modules.add(a_line.rsplit("|", 1)[1].strip().split(".")[0])
+        self.assertIn("pyjunix", imported_modules)
+        self.assertFalse(imported_modules.intersection(HEAVY_MODULES))
+        
+    def test_pyjarray_starts_within_budget(self):
+        interpreter_time = best_run_time([sys.executable, "-c", "pass"])
+        pyjbox_time = best_run_time([sys.executable, os.path.join(PROJECT_DIR, "pyjbox.py"), "pyjarray", "1"])
+        self.assertLess(pyjbox_time, STARTUP_BUDGET * interpreter_time)
+        
+        
+if __name__ == "__main__":
+    unittest.main()
+    
\ No newline at end of file